@@ -0,0 +1,176 @@
+# Shared icon atlas for the bar.
+#
+# BatteryIcon, the Volume icons and the clock Image each decoded and scaled
+# their PNGs themselves, and did it all again on every reload_config. Here
+# every PNG is decoded once, scaled to the requested height and packed into
+# one ImageSurface per height; widgets blit their rectangle out of it. The
+# atlases are kept outside the reloaded modules (see keep.py), so a
+# reload_config decodes nothing again.
+#
+#   atlas = atlas_for(24)
+#   atlas.add("~/.config/qtile/Assets/Misc/clock.png")
+#   atlas.blit(ctx, "~/.config/qtile/Assets/Misc/clock.png", x, y)
+#
+#   python assets.py   # cold vs warm load benchmark over Assets/
+
+import os
+
+import cairocffi
+from libqtile.widget import base
+
+from keep import kept
+
+_atlases = kept("assets.atlases")
+
+
+def _key(path):
+    return os.path.abspath(os.path.expanduser(path))
+
+
+def _scaled(path, height):
+    source = cairocffi.ImageSurface.create_from_png(path)
+    scale = height / source.get_height()
+    width = max(round(source.get_width() * scale), 1)
+    surface = cairocffi.ImageSurface(cairocffi.FORMAT_ARGB32, width, height)
+    ctx = cairocffi.Context(surface)
+    ctx.scale(scale, scale)
+    ctx.set_source_surface(source, 0, 0)
+    ctx.get_source().set_filter(cairocffi.FILTER_BEST)
+    ctx.paint()
+    return surface
+
+
+class Atlas:
+    """Icons of one height packed side by side into a single surface."""
+
+    def __init__(self, height):
+        self.height = height
+        self.rects = {}
+        self._pending = {}
+        self._surface = None
+        self.decodes = 0
+
+    def add(self, path):
+        """Decode and scale `path` unless it is already in the atlas."""
+        path = _key(path)
+        if path not in self.rects and path not in self._pending:
+            self._pending[path] = _scaled(path, self.height)
+            self.decodes += 1
+        return path
+
+    def add_dir(self, directory):
+        directory = _key(directory)
+        return [self.add(os.path.join(directory, name))
+                for name in sorted(os.listdir(directory)) if name.endswith(".png")]
+
+    def size(self, path):
+        self._pack()
+        _, w = self.rects[_key(path)]
+        return w, self.height
+
+    def _pack(self):
+        if not self._pending:
+            return
+        old = self._surface
+        width = sum(w for _, w in self.rects.values()) + sum(
+            s.get_width() for s in self._pending.values()
+        )
+        surface = cairocffi.ImageSurface(cairocffi.FORMAT_ARGB32, width, self.height)
+        ctx = cairocffi.Context(surface)
+        if old is not None:
+            ctx.set_source_surface(old, 0, 0)
+            ctx.paint()
+        x = old.get_width() if old is not None else 0
+        for path, icon in self._pending.items():
+            ctx.set_source_surface(icon, x, 0)
+            ctx.rectangle(x, 0, icon.get_width(), self.height)
+            ctx.fill()
+            self.rects[path] = (x, icon.get_width())
+            x += icon.get_width()
+        self._pending.clear()
+        self._surface = surface
+
+    def blit(self, ctx, path, x, y):
+        """Paint icon `path` with its top-left corner at (x, y) of `ctx`."""
+        self._pack()
+        ax, w = self.rects[_key(path)]
+        ctx.save()
+        ctx.set_source_surface(self._surface, x - ax, y)
+        ctx.rectangle(x, y, w, self.height)
+        ctx.fill()
+        ctx.restore()
+        return w
+
+
+def atlas_for(height):
+    atlas = _atlases.get(height)
+    if atlas is None:
+        atlas = _atlases[height] = Atlas(height)
+    return atlas
+
+
+class AtlasImage(base._Widget):
+    """widget.Image for PNGs, drawn from the shared atlas."""
+
+    defaults = [
+        ("filename", None, "PNG file to show"),
+        ("margin_x", 0, "Horizontal margin"),
+        ("margin_y", 0, "Vertical margin"),
+    ]
+
+    def __init__(self, **config):
+        base._Widget.__init__(self, 0, **config)
+        self.add_defaults(AtlasImage.defaults)
+
+    def _configure(self, qtile, bar):
+        base._Widget._configure(self, qtile, bar)
+        self.atlas = atlas_for(max(self.bar.height - 2 * self.margin_y, 1))
+        self.path = self.atlas.add(self.filename)
+        width, _ = self.atlas.size(self.path)
+        self.length = width + 2 * self.margin_x
+
+    def draw(self):
+        self.drawer.clear(self.background or self.bar.background)
+        self.atlas.blit(self.drawer.ctx, self.path, self.margin_x, self.margin_y)
+        self.drawer.draw(offsetx=self.offsetx, offsety=self.offsety, width=self.width)
+
+
+def _bench():
+    import importlib
+    import time
+
+    here = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Assets")
+    dirs = [os.path.join(here, d) for d in ("Battery", "Volume", "Misc")]
+
+    start = time.perf_counter()
+    for d in dirs:
+        for name in os.listdir(d):
+            if name.endswith(".png"):
+                _scaled(os.path.join(d, name), 24)
+    per_widget = time.perf_counter() - start
+
+    _atlases.clear()
+    start = time.perf_counter()
+    for d in dirs:
+        atlas_for(24).add_dir(d)
+    atlas_for(24)._pack()
+    cold = time.perf_counter() - start
+
+    # what reload_config does to this module
+    import assets
+
+    reloaded = importlib.reload(assets)
+    start = time.perf_counter()
+    for d in dirs:
+        reloaded.atlas_for(24).add_dir(d)
+    reloaded.atlas_for(24)._pack()
+    warm = time.perf_counter() - start
+
+    print(f"{reloaded.atlas_for(24).decodes} icons at 24 px")
+    print(f"  decode per widget (every reload): {per_widget * 1000:7.2f} ms")
+    print(f"  atlas cold load:                  {cold * 1000:7.2f} ms")
+    print(f"  atlas warm load (reload_config):  {warm * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    _bench()
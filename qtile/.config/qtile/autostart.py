@@ -0,0 +1,256 @@
+# Session autostart supervisor.
+#
+# Replaces autostart.sh, which backgrounded everything at once and then
+# blocked on `autorandr -c`, with no ordering, restarts or timing. Services are
+# declared in SERVICES below:
+#
+#   Service("picom", ["picom"], after=["autorandr"], restart=True)
+#
+#   after     names that must be ready before this one starts
+#   oneshot   the command is expected to exit; ready == exited with status 0
+#             (or an unknown status, see UNKNOWN_STATUS)
+#   ready     argv polled until it exits 0 (daemons only); without it a
+#             daemon is ready once it has survived `settle` seconds
+#   restart   restart a daemon when it dies, with exponential backoff
+#
+# Every service logs its start-to-ready latency, and the whole run ends with
+# a summary line, so a slow session bring-up shows up in the qtile log. The
+# supervisor only needs asyncio, so it can be driven with dummy commands:
+#
+#   python autostart.py   # runs a small demo with sleep/true/false
+
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger("libqtile")
+
+# On x11 qtile reaps children itself from a SIGCHLD handler (waitid(P_ALL)),
+# which races asyncio's child watcher; when qtile wins, asyncio has no status
+# and reports 255. The process did exit, with a status nobody knows.
+UNKNOWN_STATUS = 255
+
+
+def exited_ok(code):
+    return code == 0 or code == UNKNOWN_STATUS
+
+
+class Service:
+    def __init__(
+        self,
+        name,
+        cmd,
+        after=(),
+        oneshot=False,
+        ready=None,
+        ready_timeout=10.0,
+        settle=0.2,
+        restart=False,
+        backoff=1.0,
+        max_backoff=60.0,
+        max_restarts=5,
+    ):
+        self.name = name
+        self.cmd = list(cmd)
+        self.after = list(after)
+        self.oneshot = oneshot
+        self.ready = list(ready) if ready else None
+        self.ready_timeout = ready_timeout
+        self.settle = settle
+        self.restart = restart
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_restarts = max_restarts
+
+    def __repr__(self):
+        return f"Service({self.name!r})"
+
+
+SERVICES = [
+    Service("autorandr", ["autorandr", "-c"], oneshot=True),
+    Service("nitrogen", ["nitrogen", "--restore"], after=["autorandr"], oneshot=True),
+    Service("picom", ["picom"], after=["autorandr"], restart=True),
+    Service("dunst", ["dunst"], restart=True),
+    Service("flameshot", ["flameshot"], restart=True),
+    Service("nm-applet", ["nm-applet"], restart=True),
+    Service("xset", ["xset", "s", "off", "-dpms"], oneshot=True),
+    Service(
+        "touchpad",
+        ["xinput", "set-prop", "DELL0957:00 06CB:CDD6 Touchpad",
+         "libinput Tapping Enabled", "1"],
+        oneshot=True,
+    ),
+]
+
+
+class Supervisor:
+    def __init__(self, services=None):
+        self.services = {s.name: s for s in (services if services is not None else SERVICES)}
+        self._check_graph()
+        self.latency = {}
+        self.failed = set()
+        self.restarts = {name: 0 for name in self.services}
+        self.processes = {}
+        self._ready = {name: asyncio.Event() for name in self.services}
+        self._tasks = []
+
+    def _check_graph(self):
+        for service in self.services.values():
+            for dep in service.after:
+                if dep not in self.services:
+                    raise ValueError(f"{service.name}: unknown dependency {dep!r}")
+        visiting, done = set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"dependency cycle through {name!r}")
+            visiting.add(name)
+            for dep in self.services[name].after:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.services:
+            visit(name)
+
+    async def run(self):
+        """Start everything; returns once every service is ready or failed.
+        Restart watchers keep running in the background."""
+        start = time.monotonic()
+        await asyncio.gather(*(self._bring_up(s) for s in self.services.values()))
+        total = time.monotonic() - start
+        order = sorted(self.latency.items(), key=lambda kv: -kv[1])
+        logger.info(
+            "autostart: %d services in %.2fs (%s)%s",
+            len(self.latency),
+            total,
+            ", ".join(f"{name} {secs:.2f}s" for name, secs in order),
+            f", failed: {', '.join(sorted(self.failed))}" if self.failed else "",
+        )
+        return total
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for proc in self.processes.values():
+            if proc.returncode is None:
+                proc.terminate()
+
+    async def _bring_up(self, service):
+        for dep in service.after:
+            await self._ready[dep].wait()
+            if dep in self.failed:
+                logger.warning("autostart: %s skipped, %s failed", service.name, dep)
+                self.failed.add(service.name)
+                self._ready[service.name].set()
+                return
+        start = time.monotonic()
+        try:
+            ok = await self._start(service)
+        except OSError as e:
+            logger.warning("autostart: %s could not start: %s", service.name, e)
+            ok = False
+        if ok:
+            self.latency[service.name] = time.monotonic() - start
+            logger.debug("autostart: %s ready in %.3fs", service.name, self.latency[service.name])
+        else:
+            self.failed.add(service.name)
+        self._ready[service.name].set()
+
+    async def _spawn(self, service):
+        proc = await asyncio.create_subprocess_exec(
+            *service.cmd,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        self.processes[service.name] = proc
+        return proc
+
+    async def _start(self, service):
+        proc = await self._spawn(service)
+        if service.oneshot:
+            code = await proc.wait()
+            if code == UNKNOWN_STATUS:
+                logger.debug("autostart: %s exit status lost to the reaper", service.name)
+            elif code != 0:
+                logger.warning("autostart: %s exited with %d", service.name, code)
+            return exited_ok(code)
+
+        if service.ready:
+            ok = await self._poll_ready(service, proc)
+        else:
+            try:
+                code = await asyncio.wait_for(asyncio.shield(proc.wait()), service.settle)
+            except asyncio.TimeoutError:
+                ok = True
+            else:
+                logger.warning("autostart: %s exited early with %d", service.name, code)
+                ok = False
+        if service.restart:
+            self._tasks.append(asyncio.ensure_future(self._watch(service, proc)))
+        return ok
+
+    async def _poll_ready(self, service, proc):
+        deadline = time.monotonic() + service.ready_timeout
+        delay = 0.05
+        while time.monotonic() < deadline:
+            if proc.returncode is not None:
+                return False
+            check = await asyncio.create_subprocess_exec(
+                *service.ready,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            if exited_ok(await check.wait()):
+                return True
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 1.0)
+        logger.warning("autostart: %s not ready after %.1fs", service.name, service.ready_timeout)
+        return False
+
+    async def _watch(self, service, proc):
+        backoff = service.backoff
+        while True:
+            started = time.monotonic()
+            code = await proc.wait()
+            # a process that ran for a while resets the backoff and the count,
+            # only crashes in a row give up
+            if time.monotonic() - started > service.max_backoff:
+                backoff = service.backoff
+                self.restarts[service.name] = 0
+            if self.restarts[service.name] >= service.max_restarts:
+                logger.warning("autostart: %s died (%d), giving up", service.name, code)
+                return
+            logger.warning(
+                "autostart: %s died (%d), restarting in %.1fs", service.name, code, backoff
+            )
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, service.max_backoff)
+            self.restarts[service.name] += 1
+            try:
+                proc = await self._spawn(service)
+            except OSError as e:
+                logger.warning("autostart: %s could not restart: %s", service.name, e)
+                return
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG, format="%(message)s")
+    demo = [
+        Service("display", ["sleep", "0.3"], oneshot=True),
+        Service("wallpaper", ["true"], after=["display"], oneshot=True),
+        Service("compositor", ["sleep", "30"], after=["display"], restart=True),
+        Service("flaky", ["false"], restart=True, backoff=0.1, max_restarts=2),
+        Service("notify", ["sleep", "30"], ready=["true"]),
+    ]
+
+    async def main():
+        supervisor = Supervisor(demo)
+        await supervisor.run()
+        await asyncio.sleep(1)
+        print("restarts:", supervisor.restarts)
+        supervisor.stop()
+
+    asyncio.run(main())
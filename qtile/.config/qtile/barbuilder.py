@@ -0,0 +1,193 @@
+# Builds the bar widget list from a compact spec.
+#
+# Every widget in the old bar repeated font, fontsize, background=colors[n]
+# and a PowerLineDecoration. The spec only says what is different per
+# segment:
+#
+#   {"widget": "TextBox", "bg": "background", "fg": "foreground", "style": "text",
+#    "powerline": "rounded_left", "fmt": "Search"}
+#
+# Reserved keys:
+#   widget     widget name, see widget_factory()
+#   bg, fg     palette roles (see colors.ROLES) for background / foreground
+#   colors     {kwarg: palette role} for widgets with extra colour options
+#   style      name of an entry in `styles` merged under the segment kwargs
+#   powerline  powerline path drawn on the right edge of the segment, rendered
+#              through decorations.CachedPowerLineDecoration
+#   primary_only  left out of the bars on secondary screens (see screenlayout)
+#
+# Everything else is passed straight to the widget. The powerline colours are
+# worked out from the segment chain (this bg -> next bg), and the compiled
+# result is cached by a hash of spec + palette. The cache is kept outside
+# the reloaded modules (see keep.py), so a reload_config with an unchanged
+# bar skips all of it and only instantiates the widgets.
+#
+#   python barbuilder.py   # reload_config's module reload, with and without
+#                          # the kept cache
+
+import functools
+import hashlib
+import importlib
+import time
+
+from keep import kept
+
+RESERVED = ("widget", "bg", "fg", "colors", "style", "powerline", "primary_only")
+
+# bar spec name -> "module:attribute"; these are plain libqtile-style widgets
+# that get qtile_extras decoration support through widget.modify(). Every
+# other name is looked up on qtile_extras.widget.
+CUSTOM_WIDGETS = {
+    "Mpris": "mpris:Mpris",
+    "SampledText": "sampler:SampledText",
+    "SampledBatteryIcon": "sampler:SampledBatteryIcon",
+    "WindowTitle": "windowtitle:WindowTitle",
+    "VolumeIcon": "volume:VolumeIcon",
+    "AtlasImage": "assets:AtlasImage",
+}
+
+_cache = kept("barbuilder.compiled")
+stats = kept("barbuilder.stats", lambda: {"hits": 0, "misses": 0})
+
+
+def _canonical(obj):
+    if isinstance(obj, dict):
+        return "{" + ",".join(f"{k!r}:{_canonical(obj[k])}" for k in sorted(obj)) + "}"
+    if isinstance(obj, (list, tuple)):
+        return "[" + ",".join(_canonical(v) for v in obj) + "]"
+    if callable(obj):
+        # functions are re-created on every config import, name them instead
+        return f"<{getattr(obj, '__module__', '')}.{getattr(obj, '__qualname__', obj)}>"
+    return repr(obj)
+
+
+def fingerprint(segments, palette, styles=None):
+    data = _canonical([segments, palette, styles or {}])
+    return hashlib.sha1(data.encode()).hexdigest()
+
+
+def compile_spec(segments, palette, styles=None):
+    """Resolve colours, styles and powerline edges into per-segment kwargs.
+
+    The result holds only derived values; callables and the remaining widget
+    arguments are taken from the live spec at build time.
+    """
+    styles = styles or {}
+    compiled = []
+    for i, seg in enumerate(segments):
+        derived = dict(styles.get(seg.get("style"), {}))
+        bg = seg.get("bg", "background")
+        if "bg" in seg:
+            derived["background"] = palette[bg].rgba
+        if "fg" in seg:
+            derived["foreground"] = palette[seg["fg"]].rgba
+        for key, role in seg.get("colors", {}).items():
+            derived[key] = palette[role].rgba
+        if seg.get("powerline"):
+            nxt = segments[i + 1] if i + 1 < len(segments) else seg
+            derived["_powerline"] = {
+                "path": seg["powerline"],
+                "override_colour": palette[bg].rgba,
+                "override_next_colour": palette[nxt.get("bg", bg)].rgba,
+            }
+        compiled.append(derived)
+    return compiled
+
+
+def compiled_for(segments, palette, styles=None):
+    key = fingerprint(segments, palette, styles)
+    compiled = _cache.get(key)
+    if compiled is None:
+        stats["misses"] += 1
+        compiled = _cache[key] = compile_spec(segments, palette, styles)
+    else:
+        stats["hits"] += 1
+    return compiled
+
+
+def widget_factory(name):
+    """Callable building bar spec widget `name`."""
+    from qtile_extras import widget
+
+    target = CUSTOM_WIDGETS.get(name)
+    if target is not None:
+        module, _, attr = target.partition(":")
+        return functools.partial(widget.modify, getattr(importlib.import_module(module), attr))
+    try:
+        return getattr(widget, name)
+    except AttributeError:
+        raise ValueError(f"unknown widget {name!r}") from None
+
+
+def _default_decoration(**config):
+    from decorations import CachedPowerLineDecoration
+
+    return CachedPowerLineDecoration(**config)
+
+
+def build_widgets(segments, palette, styles=None, factory=None, decoration=None):
+    """Instantiate the widgets described by `segments`.
+
+    `factory(name)` returns the callable building widget `name`, by default
+    widget_factory.
+    """
+    factory = factory or widget_factory
+    decoration = decoration or _default_decoration
+    widgets = []
+    for seg, derived in zip(segments, compiled_for(segments, palette, styles)):
+        kwargs = {k: v for k, v in derived.items() if k != "_powerline"}
+        kwargs.update((k, v) for k, v in seg.items() if k not in RESERVED)
+        if "_powerline" in derived:
+            kwargs["decorations"] = [decoration(**derived["_powerline"])]
+        widgets.append(factory(seg["widget"])(**kwargs))
+    return widgets
+
+
+def _reload_config(here):
+    """What reload_config does to the config: reload every module next to
+    config.py, then run config.py again."""
+    import importlib
+    import os
+    import sys
+
+    for module in list(sys.modules.values()):
+        path = getattr(module, "__file__", None)
+        if module.__name__ == "config" or not path:
+            continue
+        if os.path.dirname(os.path.abspath(path)).startswith(here):
+            importlib.reload(module)
+    sys.modules.pop("config", None)
+    return importlib.import_module("config")
+
+
+def _bench(rounds=5):
+    import os
+    import sys
+
+    import keep
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, here)
+    _reload_config(here)  # first load: imports, nothing cached yet
+
+    def reloads(clear):
+        times, misses = [], 0
+        for _ in range(rounds):
+            if clear:
+                # a module-level cache, emptied by the module reload
+                keep.forget("barbuilder.compiled")
+            before = keep.kept("barbuilder.stats")["misses"]
+            start = time.perf_counter()
+            _reload_config(here)
+            times.append(time.perf_counter() - start)
+            misses += keep.kept("barbuilder.stats")["misses"] - before
+        return sorted(times)[len(times) // 2], misses
+
+    for label, clear in (("module-level cache", True), ("kept cache", False)):
+        median, misses = reloads(clear)
+        print(f"reload_config, {label:18}: {median * 1000:7.1f} ms median, "
+              f"{misses} compiles in {rounds} reloads")
+
+
+if __name__ == "__main__":
+    _bench()
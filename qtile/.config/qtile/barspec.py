@@ -0,0 +1,106 @@
+# The bar, as a spec for barbuilder (see barbuilder.py for the keys).
+#
+# Lives outside config.py so that tools can build the bar without running
+# the config (autorandr probe, hooks, the autostart supervisor):
+#
+#   bar_spec = make_bar_spec(search=search, power=power)   # config.py
+#   bar_spec = make_bar_spec()                             # benchbar.py
+
+widget_defaults = dict(
+    font="sans",
+    fontsize=12,
+    padding=3,
+)
+
+bar_styles = {
+    "text": dict(font="JetBrains Mono Bold", fontsize=13),
+    "icon": dict(font="JetBrains Mono Bold", fontsize=20),
+}
+
+
+def _on_click(callback):
+    return {"mouse_callbacks": {"Button1": callback}} if callback else {}
+
+
+def make_bar_spec(search=None, power=None):
+    """Segments of the bar, `search` and `power` run on a click."""
+    return [
+        {"widget": "Spacer", "bg": "background", "length": 20},
+        {"widget": "TextBox", "bg": "background", "fg": "foreground",
+         "text": "󰣇 ", "fontsize": 28, **_on_click(power)},
+        {"widget": "Spacer", "bg": "background", "powerline": "arrow_left",
+         "length": 10},
+        {"widget": "GroupBox", "bg": "group_background", "fg": "foreground",
+         "powerline": "rounded_left",
+         "fontsize": 24, "borderwidth": 3, "highlight_method": "block",
+         "rounded": True, "disable_drag": True,
+         "colors": {
+             "active": "active",
+             "block_highlight_text_color": "highlight_text",
+             "highlight_color": "highlight",
+             "inactive": "inactive",
+             "this_current_screen_border": "this_current_screen_border",
+             "this_screen_border": "this_screen_border",
+             "other_current_screen_border": "other_current_screen_border",
+             "other_screen_border": "other_screen_border",
+             "urgent_border": "urgent_border",
+         }},
+        {"widget": "TextBox", "bg": "background", "fg": "foreground",
+         "style": "icon", "powerline": "rounded_left", "fmt": " 󱂬"},
+        {"widget": "CurrentLayout", "bg": "background",
+         "style": "text", "powerline": "forward_slash", "fmt": "{}"},
+        {"widget": "TextBox", "bg": "powerline_background", "fg": "foreground",
+         "style": "icon", "powerline": "rounded_left", "fmt": "󰍉",
+         **_on_click(search)},
+        {"widget": "TextBox", "bg": "powerline_background", "fg": "foreground",
+         "style": "text", "powerline": "rounded_right", "fmt": "Search",
+         **_on_click(search)},
+        {"widget": "Spacer", "bg": "powerline_background", "powerline": "forward_slash",
+         "length": 10},
+        {"widget": "WindowTitle", "bg": "window_name_background", "fg": "foreground",
+         "style": "text", "format": "{name}", "empty_group_string": "Desktop"},
+        {"widget": "Spacer", "bg": "window_name_background", "powerline": "arrow_right",
+         "length": 10},
+        {"widget": "Mpris", "bg": "background", "powerline": "arrow_right",
+         "name": "spotify", "objname": "org.mpris.MediaPlayer2.spotify",
+         "format": "{title} - {artist}", "stop_pause_text": "", **widget_defaults,
+         "primary_only": True},
+        {"widget": "Systray", "bg": "background", "powerline": "arrow_right",
+         "primary_only": True},
+        {"widget": "SampledText", "bg": "window_name_background", "fg": "foreground",
+         "style": "text", "powerline": "forward_slash",
+         "section": "net", "format": " {up}   {down} ",
+         "primary_only": True},
+        {"widget": "TextBox", "bg": "background", "fg": "foreground",
+         "powerline": "back_slash", "text": "󰘚", "fontsize": 20,
+         "primary_only": True},
+        {"widget": "SampledText", "bg": "background", "fg": "foreground",
+         "style": "text", "section": "mem",
+         "format": "Mem: {MemPercent:.0f}% PSI: {some10:.0f}%",
+         "alert": ("some10", 10),
+         "primary_only": True},
+        {"widget": "TextBox", "bg": "background", "fg": "foreground",
+         "powerline": "back_slash", "text": "󰍛", "fontsize": 20,
+         "primary_only": True},
+        {"widget": "SampledText", "bg": "background", "fg": "foreground",
+         "style": "text", "powerline": "forward_slash",
+         "section": "cpu", "format": "CPU: {load_percent}% {graph}",
+         "primary_only": True},
+        {"widget": "SampledBatteryIcon", "bg": "window_name_background",
+         "theme_path": "~/.config/qtile/Assets/Battery/", "scale": 1,
+         "primary_only": True},
+        {"widget": "SampledText", "bg": "window_name_background", "fg": "foreground",
+         "style": "text", "section": "battery", "format": "{percent:2.0%}",
+         "primary_only": True},
+        {"widget": "Spacer", "bg": "group_background", "length": 8,
+         "primary_only": True},
+        {"widget": "VolumeIcon", "bg": "group_background", "fg": "foreground",
+         "style": "text", "powerline": "forward_slash",
+         "theme_path": "~/.config/qtile/Assets/Volume/",
+         "primary_only": True},
+        {"widget": "AtlasImage", "bg": "background",
+         "filename": "~/.config/qtile/Assets/Misc/clock.png", "margin_y": 6, "margin_x": 5},
+        {"widget": "Clock", "bg": "background", "fg": "foreground",
+         "style": "text", "format": "%a %d-%m-%Y  %I:%M %p"},
+        {"widget": "Spacer", "bg": "background", "length": 18},
+    ]
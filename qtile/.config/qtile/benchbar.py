@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+# Headless benchmark of the configured bar.
+#
+# Builds the primary bar from barspec.make_bar_spec() against offscreen cairo
+# surfaces (no X server, no qtile process) and replays a simulated session on
+# a virtual clock: widget timers, the shared sampler, title spam, track
+# changes and group switches all fire as they would, but ten minutes pass in
+# a few seconds. System data comes from a generated fake /proc + /sys tree,
+# D-Bus and the sound server are stubbed.
+#
+#   ./benchbar.py                              # 600 simulated seconds
+#   ./benchbar.py --seconds 120 --output run.json
+#   ./benchbar.py --compare ~/.cache/qtile/bench/bar-20260101-120000.json
+#
+# Reports per-widget draw time, frame time (all draws at one instant),
+# redraws per second and RSS over the session, and stores them as JSON under
+# ~/.cache/qtile/bench/ (or --output) so runs can be compared over time.
+# config.py itself is not imported. Widgets that cannot run headless
+# (Systray needs a real X server) are listed as skipped.
+
+import argparse
+import heapq
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RESULTS = os.path.expanduser("~/.cache/qtile/bench")
+sys.path.insert(0, HERE)
+
+HEADLESS_SKIP = {"Systray"}
+BAR_WIDTH = 1880
+BAR_HEIGHT = 30
+
+
+class VirtualClock:
+    """call_later/call_soon on simulated time."""
+
+    def __init__(self):
+        self.now = 0.0
+        self._queue = []
+        self._seq = itertools.count()
+
+    def call_later(self, delay, callback, *args):
+        handle = _Handle(callback, args)
+        heapq.heappush(self._queue, (self.now + max(delay, 0), next(self._seq), handle))
+        return handle
+
+    def call_soon(self, callback, *args):
+        return self.call_later(0, callback, *args)
+
+    def run_until(self, end):
+        while self._queue and self._queue[0][0] <= end:
+            when, _, handle = heapq.heappop(self._queue)
+            self.now = when
+            handle.run()
+        self.now = end
+
+
+class _Handle:
+    def __init__(self, callback, args):
+        self.callback = callback
+        self.args = args
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def cancelled(self):
+        return self._cancelled
+
+    def run(self):
+        if not self._cancelled:
+            self.callback(*self.args)
+
+
+class FakeLayout:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeWindow:
+    def __init__(self, name):
+        self.name = name
+        self.wid = 1
+        self.floating = self.maximized = self.minimized = False
+
+    def get_wm_class(self):
+        return ["bench", "Bench"]
+
+
+class FakeGroup:
+    def __init__(self, name, screen=None):
+        self.name = self.label = name
+        self.screen = screen
+        self.windows = []
+        self.layouts = [FakeLayout("columns"), FakeLayout("max")]
+        self.current_layout = 0
+        self.layout = self.layouts[0]
+        self.current_window = None
+
+
+class FakeScreen:
+    def __init__(self, qtile):
+        self.qtile = qtile
+        self.index = 0
+        self.group = None
+
+
+class FakeCore:
+    name = "x11"
+
+
+class FakeQtile:
+    def __init__(self, clock):
+        self.clock = clock
+        self.core = FakeCore()
+        self.current_screen = FakeScreen(self)
+        self.screens = [self.current_screen]
+        self.groups = [FakeGroup(str(i + 1)) for i in range(8)]
+        self.groups_map = {g.name: g for g in self.groups}
+        self.current_screen.group = self.current_group = self.groups[0]
+        self.groups[0].screen = self.current_screen
+        self.groups[0].current_window = FakeWindow("bench")
+
+    def call_later(self, delay, callback, *args):
+        return self.clock.call_later(delay, callback, *args)
+
+    def call_soon(self, callback, *args):
+        if args and hasattr(args[0], "close") and hasattr(args[0], "send"):
+            # create_task(widget._config_async()): D-Bus/subscriptions are stubbed
+            args[0].close()
+            return None
+        return self.clock.call_soon(callback, *args)
+
+    call_soon_threadsafe = call_soon
+
+
+class Recorder:
+    """Collects draw timings per widget and per simulated instant."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.draws = {}
+        self.frames = {}
+
+    def wrap(self, label, widget):
+        original = widget.draw
+        samples = self.draws.setdefault(label, [])
+
+        def draw(*args, **kwargs):
+            start = time.perf_counter()
+            result = original(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+            samples.append(elapsed)
+            self.frames[self.clock.now] = self.frames.get(self.clock.now, 0.0) + elapsed
+            return result
+
+        widget.draw = draw
+
+
+def make_bar_classes(qtile):
+    import cairocffi
+    from libqtile import bar as qbar
+    from libqtile.backend.base.drawer import Drawer
+
+    frame = cairocffi.ImageSurface(cairocffi.FORMAT_ARGB32, BAR_WIDTH, BAR_HEIGHT)
+    frame_ctx = cairocffi.Context(frame)
+
+    class OffscreenDrawer(Drawer):
+        def draw(self, offsetx=0, offsety=0, width=None, height=None, *args, **kwargs):
+            # what the x11 drawer does with the window, minus the window
+            frame_ctx.save()
+            frame_ctx.rectangle(offsetx, offsety, width or self.width, height or self.height)
+            frame_ctx.clip()
+            frame_ctx.set_source_surface(self.surface, offsetx, offsety)
+            frame_ctx.paint()
+            frame_ctx.restore()
+
+    class OffscreenWindow:
+        def create_drawer(self, width, height):
+            return OffscreenDrawer(qtile, self, width, height)
+
+    class OffscreenBar:
+        horizontal = True
+        border_width = [0, 0, 0, 0]
+        margin = [0, 0, 0, 0]
+
+        def __init__(self, widgets):
+            self.widgets = widgets
+            self.qtile = qtile
+            self.screen = qtile.current_screen
+            self.window = OffscreenWindow()
+            self.width = self.length = BAR_WIDTH
+            self.height = self.size = BAR_HEIGHT
+            self.background = "#000000"
+            self.full_redraws = 0
+
+        def _resize(self):
+            stretch = [w for w in self.widgets if w.length_type == qbar.STRETCH]
+            fixed = sum(w.length for w in self.widgets if w.length_type != qbar.STRETCH)
+            if stretch:
+                share = max(BAR_WIDTH - fixed, 0) // len(stretch)
+                for w in stretch:
+                    w.length = share
+            offset = 0
+            for w in self.widgets:
+                w.offsetx, w.offsety = offset, 0
+                offset += w.length
+
+        def draw(self):
+            self.full_redraws += 1
+            self._resize()
+            for w in self.widgets:
+                w.draw()
+
+    return OffscreenBar
+
+
+class FakeSystem:
+    """Writes an evolving /proc + /sys tree for the sampler probes."""
+
+    def __init__(self, root):
+        self.root = root
+        self.tick = 0
+        for path in ("proc/net", "sys/class/power_supply/BAT0", "sys/class/power_supply/AC"):
+            os.makedirs(os.path.join(root, path), exist_ok=True)
+        self._write("sys/class/power_supply/BAT0/type", "Battery\n")
+        self._write("sys/class/power_supply/AC/type", "Mains\n")
+        self.advance()
+
+    def _write(self, path, text):
+        with open(os.path.join(self.root, path), "w") as f:
+            f.write(text)
+
+    def advance(self):
+        t = self.tick = self.tick + 1
+        user, idle = 1000 * t + (t * 37) % 400, 3000 * t
+        self._write("proc/stat", f"cpu  {user} 0 {user // 4} {idle} 0 0 0 0 0 0\n")
+        self._write("proc/meminfo", (
+            "MemTotal:       16000000 kB\n"
+            "MemFree:         2000000 kB\n"
+            f"MemAvailable:    {8000000 - (t * 1000) % 2000000} kB\n"
+        ))
+        rx, tx = 50000 * t * t, 8000 * t
+        self._write("proc/net/dev", (
+            "Inter-|   Receive\n face |bytes\n"
+            "    lo: 100 0 0 0 0 0 0 0 100 0 0 0 0 0 0 0\n"
+            f"  wlan0: {rx} 0 0 0 0 0 0 0 {tx} 0 0 0 0 0 0 0\n"
+        ))
+        self._write("sys/class/power_supply/BAT0/capacity", f"{max(100 - t // 20, 5)}\n")
+        self._write("sys/class/power_supply/BAT0/status", "Discharging\n")
+
+
+def rss_kb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError):
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def localise_paths(spec):
+    """Point ~/.config/qtile/... assets at this checkout."""
+    prefix = "~/.config/qtile/"
+    out = []
+    for seg in spec:
+        seg = dict(seg)
+        for key in ("theme_path", "filename"):
+            if isinstance(seg.get(key), str) and seg[key].startswith(prefix):
+                seg[key] = os.path.join(HERE, seg[key][len(prefix):])
+        out.append(seg)
+    return out
+
+
+def run(seconds, fake_root):
+    from barbuilder import build_widgets
+    from barspec import bar_styles, make_bar_spec
+    from colors import palettes
+    from sampler import Sampler
+    from themeswitch import saved_theme
+
+    bar_spec = make_bar_spec()
+    colors = palettes[saved_theme("nord")]
+
+    clock = VirtualClock()
+    qtile = FakeQtile(clock)
+    recorder = Recorder(clock)
+    OffscreenBar = make_bar_classes(qtile)
+    system = FakeSystem(fake_root)
+    sampler = Sampler(root=fake_root, call_later=clock.call_later)
+
+    spec = [s for s in localise_paths(bar_spec) if s["widget"] not in HEADLESS_SKIP]
+    skipped = {name: "needs a real X server" for name in HEADLESS_SKIP}
+    widgets = build_widgets(spec, colors, bar_styles)
+    bar = OffscreenBar([])
+
+    for index, (seg, widget) in enumerate(zip(spec, widgets)):
+        label = f"{index:02d}:{seg['widget']}"
+        if hasattr(widget, "sampler"):
+            widget.sampler = sampler
+        try:
+            widget._configure(qtile, bar)
+        except Exception as e:  # headless gaps shouldn't sink the whole run
+            skipped[label] = f"{type(e).__name__}: {e}"
+            continue
+        recorder.wrap(label, widget)
+        bar.widgets.append(widget)
+
+    def every(interval, fn):
+        def tick():
+            fn()
+            clock.call_later(interval, tick)
+
+        clock.call_later(interval, tick)
+
+    def spam_title():
+        window = qtile.current_group.current_window
+        window.name = f"vim - benchbar.py [{int(clock.now * 10)}]"
+        for w in bar.widgets:
+            if hasattr(w, "hook_response"):
+                w.hook_response()
+
+    def change_track():
+        for w in bar.widgets:
+            if hasattr(w, "state") and hasattr(w, "_apply"):
+                w._apply({
+                    "PlaybackStatus": "Playing",
+                    "Metadata": {"xesam:title": f"Track {int(clock.now)}",
+                                 "xesam:artist": ["Bench"]},
+                })
+
+    def change_volume():
+        level = int(20 + 25 * ((clock.now // 45) % 4))
+        for w in bar.widgets:
+            if hasattr(w, "volume") and hasattr(w, "_set"):
+                w._set(level, level == 20)
+
+    def switch_group():
+        index = int(clock.now // 20) % len(qtile.groups)
+        qtile.current_screen.group = qtile.current_group = qtile.groups[index]
+        qtile.groups[index].current_window = FakeWindow(f"group {index + 1}")
+        bar.draw()
+
+    every(sampler.interval, system.advance)
+    every(0.1, spam_title)
+    every(30, change_track)
+    every(20, switch_group)
+    every(45, change_volume)
+
+    rss = [(0, rss_kb())]
+    bar.draw()
+    wall = time.perf_counter()
+    for minute in range(1, int(seconds // 60) + 1):
+        clock.run_until(minute * 60)
+        rss.append((minute * 60, rss_kb()))
+    clock.run_until(seconds)
+    wall = time.perf_counter() - wall
+
+    per_widget = {}
+    total_draws = 0
+    for label, samples in recorder.draws.items():
+        total_draws += len(samples)
+        per_widget[label] = {
+            "draws": len(samples),
+            "total_ms": round(sum(samples) * 1000, 3),
+            "mean_us": round(statistics.fmean(samples) * 1e6, 1) if samples else 0,
+            "max_us": round(max(samples) * 1e6, 1) if samples else 0,
+        }
+    frames = sorted(recorder.frames.values())
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "host": platform.node(),
+            "simulated_seconds": seconds,
+            "wall_seconds": round(wall, 3),
+        },
+        "widgets": per_widget,
+        "frames": {
+            "count": len(frames),
+            "mean_ms": round(statistics.fmean(frames) * 1000, 3) if frames else 0,
+            "p95_ms": round(frames[int(len(frames) * 0.95)] * 1000, 3) if frames else 0,
+            "max_ms": round(frames[-1] * 1000, 3) if frames else 0,
+        },
+        "redraws_per_second": round(total_draws / seconds, 2),
+        "full_bar_redraws": bar.full_redraws,
+        "rss_kb": rss,
+        "skipped": skipped,
+    }
+
+
+def report(result, previous=None):
+    print(f"{'widget':<26} {'draws':>7} {'mean us':>9} {'max us':>9} {'total ms':>9}")
+    for label, row in result["widgets"].items():
+        line = (f"{label:<26} {row['draws']:>7} {row['mean_us']:>9.1f} "
+                f"{row['max_us']:>9.1f} {row['total_ms']:>9.2f}")
+        old = (previous or {}).get("widgets", {}).get(label)
+        if old and old["mean_us"]:
+            line += f"  ({(row['mean_us'] / old['mean_us'] - 1) * 100:+.0f}%)"
+        print(line)
+    frames = result["frames"]
+    print(f"frames: {frames['count']}, mean {frames['mean_ms']} ms, "
+          f"p95 {frames['p95_ms']} ms, max {frames['max_ms']} ms")
+    print(f"redraws/s: {result['redraws_per_second']}"
+          + (f" (was {previous['redraws_per_second']})" if previous else ""))
+    print(f"rss: {result['rss_kb'][0][1]} kB -> {result['rss_kb'][-1][1]} kB")
+    for label, reason in result["skipped"].items():
+        print(f"skipped {label}: {reason}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="headless bar benchmark")
+    parser.add_argument("--seconds", type=int, default=600, help="simulated session length")
+    parser.add_argument("--output",
+                        help="JSON file (default ~/.cache/qtile/bench/bar-<time>.json)")
+    parser.add_argument("--compare", help="previous JSON result to compare with")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="benchbar-") as fake_root:
+        result = run(args.seconds, fake_root)
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    report(result, previous)
+
+    output = args.output or os.path.join(
+        RESULTS, f"bar-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
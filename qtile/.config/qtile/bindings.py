@@ -0,0 +1,98 @@
+# The key bindings.
+#
+# They used to be built inline in config.py, so printing the cheat-sheet
+# meant importing config.py, which starts the spawner, the supervisor and
+# the rest of the session. make_keymap() only needs the objects the
+# bindings call into:
+#
+#   keymap = make_keymap(spawner, prewarmer, layout_state)
+#   keys = keymap.compile()
+#
+#   python keymap.py      # cheat-sheet of these bindings
+
+from libqtile.config import Key
+from libqtile.lazy import lazy
+
+import themeswitch
+from keymap import Keymap
+
+mod = "mod4"
+
+# names of the regular groups, bound to their number keys
+GROUP_NAMES = [f"{i+1}" for i in range(8)]
+
+GROUP_KEYS = [
+    # mod1 + letter of group = switch to group
+    ([], lambda name: lazy.group[name].toscreen(), "Switch to group {}"),
+    # mod1 + shift + letter of group = switch to & move focused window to group
+    (["shift"], lambda name: lazy.window.togroup(name, switch_group=True),
+     "Switch to & move focused window to group {}"),
+    # Or, use below if you prefer not to switch to that group.
+    # # mod1 + shift + letter of group = move focused window to group
+    # (["shift"], lambda name: lazy.window.togroup(name), "move focused window to group {}"),
+]
+
+
+def make_keymap(spawner, prewarmer, layout_state, groups=GROUP_NAMES):
+    """Keymap with every binding; `groups` are the names add_groups binds."""
+    keymap = Keymap()
+    keymap.extend([
+        # A list of available commands that can be bound to keys can be found
+        # at https://docs.qtile.org/en/latest/manual/config/lazy.html
+        # Switch between windows
+        Key([mod], "h", lazy.layout.left(), desc="Move focus to left"),
+        Key([mod], "l", lazy.layout.right(), desc="Move focus to right"),
+        Key([mod], "j", lazy.layout.down(), desc="Move focus down"),
+        Key([mod], "k", lazy.layout.up(), desc="Move focus up"),
+        Key([mod], "space", lazy.layout.next(), desc="Move window focus to other window"),
+        Key([mod], "f", lazy.window.toggle_fullscreen()),
+        Key([mod], "a", lazy.window.toggle_floating()),
+        # Move windows between left/right columns or move up/down in current stack.
+        # Moving out of range in Columns layout will create new column.
+        Key([mod, "shift"], "left", lazy.layout.shuffle_left(), desc="Move window to the left"),
+        Key([mod, "shift"], "right", lazy.layout.shuffle_right(), desc="Move window to the right"),
+        Key([mod, "shift"], "down", lazy.layout.shuffle_down(), desc="Move window down"),
+        Key([mod, "shift"], "up", lazy.layout.shuffle_up(), desc="Move window up"),
+        # Grow windows. If current window is on the edge of screen and direction
+        # will be to screen edge - window would shrink.
+        Key([mod, "control"], "h", lazy.layout.grow_left(), desc="Grow window to the left"),
+        Key([mod, "control"], "l", lazy.layout.grow_right(), desc="Grow window to the right"),
+        Key([mod, "control"], "j", lazy.layout.grow_down(), desc="Grow window down"),
+        Key([mod, "control"], "k", lazy.layout.grow_up(), desc="Grow window up"),
+        # mod+n is the obsidian dropdown
+        Key([mod, "control"], "n", lazy.layout.normalize(), desc="Reset all window sizes"),
+        # Toggle between split and unsplit sides of stack.
+        # Split = all windows displayed
+        # Unsplit = 1 window displayed, like Max layout, but still with
+        # multiple stack panes
+        Key(
+            [mod, "shift"],
+            "Return",
+            lazy.layout.toggle_split(),
+            desc="Toggle between split and unsplit sides of stack",
+        ),
+        Key([mod], "Return", lazy.function(spawner.terminal), desc="Launch terminal"),
+        # Toggle between different layouts as defined below
+        Key([mod], "Tab", lazy.next_layout(), desc="Toggle between layouts"),
+        Key([mod], "w", lazy.window.kill(), desc="Kill focused window"),
+        Key([mod, "control"], "r", lazy.function(layout_state.reload), desc="Reload the config"),
+        Key([mod, "shift"], "t", lazy.function(themeswitch.cycle), desc="Switch colour theme"),
+        Key([mod, "control"], "q", lazy.shutdown(), desc="Shutdown Qtile"),
+        Key([mod], "r", lazy.spawncmd(), desc="Spawn a command using a prompt widget"),
+        Key([mod], "d", lazy.function(spawner.launch, 'rofi -show drun'), desc="menu rofi"),
+        Key([], "Print", lazy.function(spawner.launch, 'flameshot gui'), desc="flameshot screenshot"),
+        # Key([], "F12", lazy.function(show_neofetch))
+    ], section="core")
+    keymap.add(Key([mod], "e", lazy.function(spawner.launch, "nemo"), desc="File manager"),
+               section="core")
+    keymap.add_groups(mod, groups, GROUP_KEYS)
+    keymap.extend([
+        Key([mod], "m", lazy.function(prewarmer.toggle, 'term'), desc="Terminal dropdown"),
+        Key([mod], "n", lazy.function(prewarmer.toggle, 'obsidian'), desc="Obsidian dropdown"),
+        # Key([mod], "c", lazy.group['scratchpad'].dropdown_toggle('ranger')),
+        # Key([mod], "v", lazy.group['scratchpad'].dropdown_toggle('volume')),
+        # Key([mod], "m", lazy.group['scratchpad'].dropdown_toggle('mus')),
+        # Key([mod], "b", lazy.group['scratchpad'].dropdown_toggle('news')),
+        # Key([mod, "shift"], "n", lazy.group['scratchpad'].dropdown_toggle('term2')),
+    ], section="scratchpad")
+    return keymap
@@ -3,34 +3,162 @@
 # https://github.com/antoniosarosi/dotfiles
 
 # Theming for Qtile
+#
+# The theme name comes from config.json ({"theme": "arc"}, "arc" if there is
+# no config.json) and the colours from themes/<name>.json. A theme file is
+# checked against SCHEMA; a missing or broken one logs a warning and falls
+# back to the built-in arc palette instead of failing the whole config.
+#
+# Parsed themes are cached by file mtime and size, in memory and as marshal
+# files under ~/.cache/qtile/themes, so reloads don't parse JSON again. The
+# memory cache has to outlive reload_config, which reloads this module, so
+# it lives on a module without a file (like keep.py in the main config,
+# which can't be imported from here). marshal's format belongs to the
+# Python version, so that is part of the cache file name.
 
-from os import path
-import subprocess
+from os import makedirs, path, stat
 import json
+import marshal
+import re
+import sys
+import types
+
+from libqtile.log_utils import logger
 
 from settings.path import qtile_path
 
+DEFAULT_THEME = "arc"
+CACHE_DIR = path.join(path.expanduser("~"), ".cache", "qtile", "themes")
+
+# every theme defines these, each as "#rrggbb" or a list of one or two
+# (gradient) "#rrggbb" strings
+SCHEMA = (
+    "dark", "grey", "light", "text", "focus", "active", "inactive", "urgent",
+    "color1", "color2", "color3", "color4",
+)
+
+BUILTIN = {
+    "dark": ["#0f101a", "#0f101a"],
+    "grey": ["#353c4a", "#353c4a"],
+    "light": ["#f1ffff", "#f1ffff"],
+    "text": ["#0f101a", "#0f101a"],
+    "focus": ["#a151d3", "#a151d3"],
+    "active": ["#f1ffff", "#f1ffff"],
+    "inactive": ["#4c566a", "#4c566a"],
+    "urgent": ["#F07178", "#F07178"],
+    "color1": ["#a151d3", "#a151d3"],
+    "color2": ["#F07178", "#F07178"],
+    "color3": ["#fb9f7f", "#fb9f7f"],
+    "color4": ["#ffd47e", "#ffd47e"],
+}
+
+_HEX = re.compile(r"^#[0-9a-fA-F]{6}$")
+
+# the store keep.py uses
+_STORE = "qtile_config_kept"
+
+
+def _kept(name):
+    store = sys.modules.get(_STORE)
+    if store is None:
+        store = sys.modules[_STORE] = types.ModuleType(_STORE)
+        store.values = {}
+    return store.values.setdefault(name, {})
+
+
+_cache = _kept("settings.theme")
+
 
-def load_theme():
-    theme = "arc"
+def validate(theme):
+    """Theme dict in canonical form (every colour a 2-item list), or ValueError."""
+    if not isinstance(theme, dict):
+        raise ValueError("theme must be a JSON object")
+    missing = [key for key in SCHEMA if key not in theme]
+    if missing:
+        raise ValueError(f"missing colours: {', '.join(missing)}")
+    colors = {}
+    for key in SCHEMA:
+        value = theme[key]
+        if isinstance(value, str):
+            value = [value]
+        if (not isinstance(value, list) or not 1 <= len(value) <= 2
+                or not all(isinstance(v, str) and _HEX.match(v) for v in value)):
+            raise ValueError(f"{key}: expected \"#rrggbb\" or a list of 1-2 of them")
+        colors[key] = value * 2 if len(value) == 1 else list(value)
+    return colors
 
+
+def _stamp(file):
+    try:
+        st = stat(file)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _cache_file(name):
+    version = "%d%d" % sys.version_info[:2]
+    return path.join(CACHE_DIR, f"{name}.py{version}.marshal")
+
+
+def _read_cached(name, stamp):
+    try:
+        with open(_cache_file(name), "rb") as f:
+            cached_stamp, colors = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    return colors if tuple(cached_stamp) == stamp else None
+
+
+def _write_cached(name, stamp, colors):
+    try:
+        makedirs(CACHE_DIR, exist_ok=True)
+        with open(_cache_file(name), "wb") as f:
+            marshal.dump((stamp, colors), f)
+    except OSError:
+        pass
+
+
+def theme_name():
     config = path.join(qtile_path, "config.json")
-    if path.isfile(config):
+    stamp = _stamp(config)
+    if stamp is None:
+        return DEFAULT_THEME
+    cached = _cache.get(config)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    try:
         with open(config) as f:
-            theme = json.load(f)["theme"]
-    else:
-        with open(config, "w") as f:
-            f.write(f'{{"theme": "{theme}"}}\n')
-
+            name = json.load(f)["theme"]
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning("%s: %s, using theme %r", config, e, DEFAULT_THEME)
+        name = DEFAULT_THEME
+    _cache[config] = (stamp, name)
+    return name
 
-    theme_file = path.join(qtile_path, "themes", f'{theme}.json')
-    if not path.isfile(theme_file):
-        raise Exception(f'"{theme_file}" does not exist')
 
-    with open(path.join(theme_file)) as f:
-        return json.load(f)
+def load_theme(name=None):
+    name = name or theme_name()
+    theme_file = path.join(qtile_path, "themes", f"{name}.json")
+    stamp = _stamp(theme_file)
+    if stamp is None:
+        logger.warning("%s does not exist, using the built-in theme", theme_file)
+        return dict(BUILTIN)
 
+    cached = _cache.get(theme_file)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    colors = _read_cached(name, stamp)
+    if colors is None:
+        try:
+            with open(theme_file) as f:
+                colors = validate(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.warning("%s: %s, using the built-in theme", theme_file, e)
+            return dict(BUILTIN)
+        _write_cached(name, stamp, colors)
+    _cache[theme_file] = (stamp, colors)
+    return colors
 
-if __name__ == "settings.theme":
-    colors = load_theme()
 
+colors = load_theme()
@@ -1,43 +1,186 @@
-dracula = [
-    ['#282738'], # 0 background
-    ['#CAA9E0'], # 1 backgroud 2
-    ['#ffffff'], # 2 foreground
-    ['#ffffff'], # 3 block_highlight_text_color
-    ['#CAA9E0'], # 4 active
-    ['#ffffff'], # 5 block_highlight_text_color
-    ['#4B427E'], # 6 highlight_color
-    ['#282738'], # 7 inactive
-    ['#4B427E'], # 8 foreground group box
-    ['#353446'], # 9 bg group box
-    ['#353446'], # 10 this_current_screen_border group box
-    ['#353446'], # 11 this_screen_border group box
-    ['#353446'], # 12 other_current_screen_border group box
-    ['#353446'], # 13 other_screen_border group box
-    ['#353446'], # 14 urgent_border group box
-    ['#282738'], # 15 bg powerline
-    ['#353446'], # 16 bg window name
-    ['#353446'], # 16 bg window name
-    
-]
-
-nord = [
-    ['#3B4252'], # 0 background
-    ['#4C566A'], # 1 backgroud 2
-    ['#ffffff'], # 2 foreground
-    ['#ffffff'], # 3 block_highlight_text_color
-    ['9a9a9a'], # 4 active
-    ['#ffffff'], # 5 block_highlight_text_color
-    ['#4B427E'], # 6 highlight_color
-    ['#4C566A'], # 7 inactive
-    ['#3B4252'], # 8 foreground group box
-    ['#2E3440'], # 9 bg group box
-    ['#2E3440'], # 10 this_current_screen_border group box
-    ['#2E3440'], # 11 this_screen_border group box
-    ['#2E3440'], # 12 other_current_screen_border group box
-    ['#2E3440'], # 13 other_screen_border group box
-    ['#2E3440'], # 14 urgent_border group box
-    ['#282738'], # 15 bg powerline
-    ['#2E3440'], # 16 urgent_border group box
-    ['#2E3440'], # 17 urgent_border group box
-    ['#2E3440'], # 18 urgent_border group box
-]
\ No newline at end of file
+# Colour palettes.
+#
+# Each palette is a Palette object with named roles instead of a list looked
+# up by magic index (colors[15], colors[16], ...). Every colour is validated
+# and parsed once at import; the bar gets ready-made (r, g, b, a) tuples,
+# which qtile's drawer uses as is, so nothing parses hex strings at draw time.
+# Hover, dimmed and urgent variants are precomputed alongside.
+#
+#   python colors.py           # validate every palette and print it
+#   python colors.py --bench   # role lookup vs the old list indexing
+
+import re
+import sys
+
+_HEX = re.compile(r"^#([0-9a-fA-F]{6})([0-9a-fA-F]{2})?$")
+
+URGENT_TINT = (255, 85, 85)
+
+
+def parse_hex(value):
+    """'#rrggbb' or '#rrggbbaa' -> (r, g, b, alpha 0..1)."""
+    match = _HEX.match(value) if isinstance(value, str) else None
+    if match is None:
+        raise ValueError(f"invalid colour {value!r}, expected #rrggbb or #rrggbbaa")
+    rgb, alpha = match.groups()
+    return (
+        int(rgb[0:2], 16),
+        int(rgb[2:4], 16),
+        int(rgb[4:6], 16),
+        round(int(alpha, 16) / 255, 3) if alpha else 1.0,
+    )
+
+
+def _mix(rgba, target, amount):
+    r, g, b, a = rgba
+    return (
+        round(r + (target[0] - r) * amount),
+        round(g + (target[1] - g) * amount),
+        round(b + (target[2] - b) * amount),
+        a,
+    )
+
+
+def to_hex(rgba):
+    r, g, b, a = rgba
+    if a >= 1.0:
+        return f"#{r:02x}{g:02x}{b:02x}"
+    return f"#{r:02x}{g:02x}{b:02x}{round(a * 255):02x}"
+
+
+class Color:
+    __slots__ = ("hex", "rgba", "hover", "dimmed", "urgent")
+
+    def __init__(self, value):
+        self.rgba = parse_hex(value)
+        self.hex = to_hex(self.rgba)
+        self.hover = _mix(self.rgba, (255, 255, 255), 0.15)
+        self.dimmed = _mix(self.rgba, (0, 0, 0), 0.4)
+        self.urgent = _mix(self.rgba, URGENT_TINT, 0.5)
+
+    def __repr__(self):
+        return f"Color({self.hex!r})"
+
+
+ROLES = (
+    "background",
+    "background_alt",
+    "foreground",
+    "highlight_text",
+    "active",
+    "highlight",
+    "inactive",
+    "group_foreground",
+    "group_background",
+    "this_current_screen_border",
+    "this_screen_border",
+    "other_current_screen_border",
+    "other_screen_border",
+    "urgent_border",
+    "powerline_background",
+    "window_name_background",
+    "window_border",
+)
+
+
+class Palette:
+    __slots__ = ("name",) + ROLES
+
+    def __init__(self, name, **roles):
+        missing = set(ROLES) - set(roles)
+        unknown = set(roles) - set(ROLES)
+        if missing or unknown:
+            raise ValueError(
+                f"palette {name!r}: missing roles {sorted(missing)}, unknown {sorted(unknown)}"
+            )
+        self.name = name
+        for role, value in roles.items():
+            try:
+                setattr(self, role, Color(value))
+            except ValueError as e:
+                raise ValueError(f"palette {name!r}, role {role!r}: {e}") from None
+
+    def __getitem__(self, role):
+        return getattr(self, role)
+
+    def __iter__(self):
+        return ((role, getattr(self, role)) for role in ROLES)
+
+    def __repr__(self):
+        return f"Palette({self.name!r}, " + ", ".join(c.hex for _, c in self) + ")"
+
+
+dracula = Palette(
+    "dracula",
+    background="#282738",
+    background_alt="#CAA9E0",
+    foreground="#ffffff",
+    highlight_text="#ffffff",
+    active="#CAA9E0",
+    highlight="#4B427E",
+    inactive="#282738",
+    group_foreground="#4B427E",
+    group_background="#353446",
+    this_current_screen_border="#353446",
+    this_screen_border="#353446",
+    other_current_screen_border="#353446",
+    other_screen_border="#353446",
+    urgent_border="#353446",
+    powerline_background="#282738",
+    window_name_background="#353446",
+    window_border="#1F1D2E",
+)
+
+nord = Palette(
+    "nord",
+    background="#3B4252",
+    background_alt="#4C566A",
+    foreground="#ffffff",
+    highlight_text="#ffffff",
+    active="#9a9a9a",
+    highlight="#4B427E",
+    inactive="#4C566A",
+    group_foreground="#3B4252",
+    group_background="#2E3440",
+    this_current_screen_border="#2E3440",
+    this_screen_border="#2E3440",
+    other_current_screen_border="#2E3440",
+    other_screen_border="#2E3440",
+    urgent_border="#2E3440",
+    powerline_background="#282738",
+    window_name_background="#2E3440",
+    window_border="#1F1D2E",
+)
+
+palettes = {p.name: p for p in (dracula, nord)}
+
+
+def _bench(rounds=1_000_000):
+    import timeit
+
+    legacy = [[c.hex] for _, c in nord]
+    idx = ROLES.index("window_name_background")
+    print(f"{rounds} lookups")
+    t = timeit.timeit(lambda: legacy[idx], number=rounds)
+    print(f"  list index colors[{idx}]          {t * 1e9 / rounds:6.1f} ns")
+    t = timeit.timeit(lambda: nord.window_name_background.rgba, number=rounds)
+    print(f"  nord.window_name_background.rgba {t * 1e9 / rounds:6.1f} ns")
+    # what the drawer did with the old value on every paint
+    t = timeit.timeit(lambda: parse_hex(legacy[idx][0]), number=rounds // 10)
+    print(f"  hex parse per draw (old path)    {t * 1e9 / (rounds // 10):6.1f} ns")
+
+
+def main(argv):
+    if "--bench" in argv:
+        _bench()
+        return 0
+    for palette in palettes.values():
+        print(palette.name)
+        for role, color in palette:
+            print(f"  {role:<28} {color.hex}")
+    print("all palettes valid")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,130 @@
+# Pre-rendered powerline segments.
+#
+# PowerLineDecoration redraws its cairo path every time the widget redraws,
+# although a given (path, size, colours) combination always produces the same
+# pixels. CachedPowerLineDecoration renders each combination once into an
+# offscreen ImageSurface and afterwards just paints that surface. The key
+# includes the widget length and bar height, shift and padding, so a resized
+# bar or a new palette simply misses the cache; invalidate() drops everything
+# explicitly (theme switches call it). The surfaces are kept across
+# reload_config (see keep.py).
+#
+#   python decorations.py   # headless draw-path vs blit benchmark
+
+from collections import OrderedDict
+
+import cairocffi
+from qtile_extras.widget.decorations import PowerLineDecoration
+
+from keep import kept
+
+MAX_ENTRIES = 128
+
+_surfaces = kept("decorations.surfaces", OrderedDict)
+stats = kept("decorations.stats", lambda: {"hits": 0, "misses": 0})
+
+
+def invalidate():
+    _surfaces.clear()
+
+
+class CachedPowerLineDecoration(PowerLineDecoration):
+    """PowerLineDecoration that blits a cached rendering of itself."""
+
+    def _key(self):
+        colour = self.override_colour
+        next_colour = self.override_next_colour
+        if colour is None or next_colour is None:
+            # colours come from the neighbours at draw time, can't cache safely
+            return None
+        return (
+            self.path,
+            self.size,
+            self.shift,
+            self.padding_x,
+            self.padding_y,
+            self.parent.length,
+            self.parent.bar.height,
+            _hashable(colour),
+            _hashable(next_colour),
+        )
+
+    def _render(self, width, height):
+        surface = cairocffi.ImageSurface(cairocffi.FORMAT_ARGB32, width, height)
+        offscreen = cairocffi.Context(surface)
+        drawer_ctx = self.drawer.ctx
+        own_ctx = self.__dict__.get("ctx")
+        self.drawer.ctx = offscreen
+        if own_ctx is not None:
+            self.ctx = offscreen
+        try:
+            PowerLineDecoration.draw(self)
+        finally:
+            self.drawer.ctx = drawer_ctx
+            if own_ctx is not None:
+                self.ctx = own_ctx
+        surface.flush()
+        return surface
+
+    def draw(self):
+        key = self._key()
+        if key is None:
+            PowerLineDecoration.draw(self)
+            return
+        surface = _surfaces.get(key)
+        if surface is None:
+            stats["misses"] += 1
+            surface = _surfaces[key] = self._render(self.parent.length, self.parent.bar.height)
+            if len(_surfaces) > MAX_ENTRIES:
+                _surfaces.popitem(last=False)
+        else:
+            stats["hits"] += 1
+            _surfaces.move_to_end(key)
+        ctx = self.drawer.ctx
+        ctx.save()
+        ctx.set_source_surface(surface, 0, 0)
+        ctx.paint()
+        ctx.restore()
+
+
+def _hashable(colour):
+    return tuple(colour) if isinstance(colour, list) else colour
+
+
+def _bench(rounds=5000, width=60, height=30):
+    import time
+
+    target = cairocffi.ImageSurface(cairocffi.FORMAT_ARGB32, width, height)
+    ctx = cairocffi.Context(target)
+
+    def arrow(c):
+        c.set_source_rgba(0.23, 0.26, 0.32, 1)
+        c.rectangle(0, 0, width, height)
+        c.fill()
+        c.set_source_rgba(0.18, 0.2, 0.25, 1)
+        c.move_to(width - 15, 0)
+        c.line_to(width, height / 2)
+        c.line_to(width - 15, height)
+        c.close_path()
+        c.fill()
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        arrow(ctx)
+    uncached = (time.perf_counter() - start) / rounds
+
+    cached = cairocffi.ImageSurface(cairocffi.FORMAT_ARGB32, width, height)
+    arrow(cairocffi.Context(cached))
+    start = time.perf_counter()
+    for _ in range(rounds):
+        ctx.set_source_surface(cached, 0, 0)
+        ctx.paint()
+    blit = (time.perf_counter() - start) / rounds
+
+    print(f"powerline segment {width}x{height}, {rounds} draws")
+    print(f"  cairo path each draw: {uncached * 1e6:7.2f} us")
+    print(f"  cached surface blit:  {blit * 1e6:7.2f} us")
+
+
+if __name__ == "__main__":
+    _bench()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# Fake MPRIS player on the session bus, to exercise mpris.Mpris without spotify.
+#
+#   ./fake_mpris.py                      # owns org.mpris.MediaPlayer2.spotify
+#   ./fake_mpris.py --rate 5 --count 50  # 5 track changes per second, then exit
+#
+# Run it inside `dbus-run-session` to keep it off your real session bus. The
+# widget's `redraws` counter (qtile cmd-obj -o widget mpris -f eval
+# -a "self.redraws") should grow by exactly one per emitted change, and not at
+# all while the player idles.
+
+import argparse
+import asyncio
+import time
+
+from dbus_next import Variant
+from dbus_next.aio import MessageBus
+from dbus_next.service import PropertyAccess, ServiceInterface, dbus_property
+
+from mpris import MPRIS_PATH, PLAYER_IFACE
+
+
+class FakePlayer(ServiceInterface):
+    def __init__(self):
+        super().__init__(PLAYER_IFACE)
+        self._status = "Stopped"
+        self._metadata = {}
+
+    @dbus_property(access=PropertyAccess.READ)
+    def PlaybackStatus(self) -> "s":  # noqa: F821
+        return self._status
+
+    @dbus_property(access=PropertyAccess.READ)
+    def Metadata(self) -> "a{sv}":  # noqa: F821
+        return self._metadata
+
+    def play(self, title, artist):
+        self._status = "Playing"
+        self._metadata = {
+            "xesam:title": Variant("s", title),
+            "xesam:artist": Variant("as", [artist]),
+        }
+        self.emit_properties_changed(
+            {"PlaybackStatus": self._status, "Metadata": self._metadata}
+        )
+
+    def pause(self):
+        self._status = "Paused"
+        self.emit_properties_changed({"PlaybackStatus": self._status})
+
+
+async def main(args):
+    bus = await MessageBus().connect()
+    player = FakePlayer()
+    bus.export(MPRIS_PATH, player)
+    await bus.request_name(args.name)
+
+    start = time.monotonic()
+    for i in range(args.count):
+        if args.pause_every and i % args.pause_every == args.pause_every - 1:
+            player.pause()
+        else:
+            player.play(f"Track {i}", "Fake Artist")
+        await asyncio.sleep(1 / args.rate)
+    elapsed = time.monotonic() - start
+    print(f"emitted {args.count} changes in {elapsed:.2f}s")
+
+    if args.linger:
+        await asyncio.sleep(args.linger)
+    bus.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake MPRIS player for mpris.Mpris")
+    parser.add_argument("--name", default="org.mpris.MediaPlayer2.spotify")
+    parser.add_argument("--rate", type=float, default=1.0, help="changes per second")
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--pause-every", type=int, default=0)
+    parser.add_argument("--linger", type=float, default=0, help="idle seconds before exit")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,78 @@
+# Fixed-size sample history for the bar metrics.
+#
+# A Ring keeps the last `size` samples of one series in a preallocated
+# array plus a running sum, so pushing a sample and asking for the moving
+# average never allocate. sparkline() turns a ring into block characters
+# for widgets that want a small graph in their text, human_bytes() formats
+# the byte rates next to it.
+
+from array import array
+
+BLOCKS = " ▁▂▃▄▅▆▇█"
+
+
+class Ring:
+    """Last `size` float samples, oldest overwritten first."""
+
+    __slots__ = ("data", "size", "pos", "count", "total")
+
+    def __init__(self, size):
+        self.data = array("d", bytes(8 * size))
+        self.size = size
+        self.pos = 0
+        self.count = 0
+        self.total = 0.0
+
+    def push(self, value):
+        self.total += value - self.data[self.pos]
+        self.data[self.pos] = value
+        self.pos = (self.pos + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+
+    def clear(self):
+        for i in range(self.size):
+            self.data[i] = 0.0
+        self.pos = self.count = 0
+        self.total = 0.0
+
+    def last(self):
+        return self.data[self.pos - 1] if self.count else 0.0
+
+    def average(self):
+        return self.total / self.count if self.count else 0.0
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        """Samples oldest to newest."""
+        start = self.pos - self.count
+        for i in range(start, self.pos):
+            yield self.data[i % self.size]
+
+
+def sparkline(values, width=None, top=None):
+    """Block-character graph of `values`, scaled to `top` (default: the max)."""
+    values = list(values)
+    if width is not None:
+        values = values[-width:]
+        values = [0.0] * (width - len(values)) + values
+    if top is None:
+        top = max(values, default=0.0)
+    if top <= 0:
+        return BLOCKS[0] * len(values)
+    steps = len(BLOCKS) - 1
+    return "".join(BLOCKS[min(round(v / top * steps), steps)] for v in values)
+
+
+def human_bytes(value, prefix=None):
+    units = ["B", "kB", "MB", "GB", "TB"]
+    if prefix is not None:
+        idx = {"": 0, "k": 1, "M": 2, "G": 3, "T": 4}[prefix]
+        return f"{value / 1000 ** idx:.1f}{units[idx]}"
+    idx = 0
+    while value >= 1000 and idx < len(units) - 1:
+        value /= 1000
+        idx += 1
+    return f"{value:.1f}{units[idx]}"
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# Config import time budget check, based on `python -X importtime`.
+#
+#   ./importtime.py                 # fail if `import config` > 400 ms
+#   ./importtime.py --budget 250 --top 15
+#
+# Exits 1 when the cumulative import time of the config module exceeds the
+# budget and prints the heaviest imports, so a new widget that drags in a big
+# dependency at import time shows up right away. Nothing in the config is
+# imported lazily: config.py builds the bars while it is imported, so
+# qtile_extras, the cairo-backed widgets and our own widget modules are all
+# part of the measured time, and the budget is set with them in it. Run it
+# from a shell where libqtile and qtile_extras are importable.
+
+import argparse
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def measure(module="config"):
+    """Return [(cumulative_us, self_us, name)] for one fresh import of `module`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=HERE,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), int(self_us), name.rstrip()))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="config import time budget")
+    parser.add_argument("--budget", type=float, default=400, help="milliseconds")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--module", default="config")
+    args = parser.parse_args(argv)
+
+    rows = measure(args.module)
+    total = next((c for c, _, name in rows if name.strip() == args.module), 0) / 1000
+    for cumulative, self_us, name in sorted(rows, key=lambda r: -r[1])[: args.top]:
+        print(f"{self_us / 1000:8.2f} ms self {cumulative / 1000:8.2f} ms cum  {name.strip()}")
+    verdict = "OK" if total <= args.budget else "OVER BUDGET"
+    print(f"import {args.module}: {total:.1f} ms (budget {args.budget:.0f} ms) {verdict}")
+    return 0 if total <= args.budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+# State that outlives reload_config.
+#
+# reload_config re-runs every module next to config.py (libqtile's
+# confreader reloads the config directory's submodules), so a plain
+# module-level cache is empty again after each reload. kept(name) returns an
+# object stored on a module that has no file: the reload never touches it,
+# and it lives as long as the qtile process.
+#
+#   _cache = kept("barbuilder.compiled")
+#   stats = kept("barbuilder.stats", lambda: {"hits": 0, "misses": 0})
+#
+# Keep plain data here (dicts, surfaces, parsed files). Instances of classes
+# defined in the config directory keep running the code from before the
+# reload.
+
+import sys
+import types
+
+STORE = "qtile_config_kept"
+
+
+def _store():
+    store = sys.modules.get(STORE)
+    if store is None:
+        store = sys.modules[STORE] = types.ModuleType(STORE)
+        store.values = {}
+    return store.values
+
+
+def kept(name, factory=dict):
+    values = _store()
+    value = values.get(name)
+    if value is None:
+        value = values[name] = factory()
+    return value
+
+
+def forget(name=None):
+    """Drop one kept value, or all of them (benchmarks, tests)."""
+    if name is None:
+        _store().clear()
+    else:
+        _store().pop(name, None)
@@ -0,0 +1,139 @@
+# Key bindings compiled into one table.
+#
+# config.py used to grow `keys` in four places (a literal list, an append, a
+# loop over the groups and the scratchpad extend), and nothing noticed that
+# mod+n got bound twice. Keymap collects the bindings into a dict keyed by
+# (modifiers, key), so each addition is one lookup: a second binding for the
+# same combination is reported, as a duplicate when it runs the same
+# commands and as shadowing the first one otherwise (qtile only keeps the
+# last). compile() logs what it found and returns the list for `keys`.
+#
+#   keymap = Keymap()
+#   keymap.extend([Key([mod], "h", lazy.layout.left())], section="windows")
+#   keymap.add_groups(mod, GROUP_NAMES, GROUP_KEYS)
+#   keys = keymap.compile()
+#
+#   python keymap.py      # cheat-sheet of the bindings in bindings.py
+
+from libqtile.log_utils import logger
+
+MODIFIER_NAMES = {"mod1": "alt", "mod4": "super", "control": "ctrl"}
+
+
+def combo(modifiers, key):
+    """Table key: modifier order and the case of single letters don't matter."""
+    return frozenset(m.lower() for m in modifiers), key.lower() if len(key) == 1 else key
+
+
+def describe(binding):
+    if binding.desc:
+        return binding.desc
+    parts = []
+    for command in binding.commands:
+        name = getattr(command, "name", None) or repr(command)
+        args = ", ".join(repr(a) for a in getattr(command, "args", ()))
+        parts.append(f"{name}({args})")
+    return "; ".join(parts)
+
+
+def _signature(command):
+    # LazyCall has no __eq__, compare what it would call
+    if not hasattr(command, "name"):
+        return repr(command)
+    return (
+        command.name,
+        repr(getattr(command, "selectors", None)),
+        repr(getattr(command, "args", ())),
+        repr(sorted(getattr(command, "kwargs", {}).items())),
+    )
+
+
+def _same_commands(a, b):
+    return [_signature(c) for c in a.commands] == [_signature(c) for c in b.commands]
+
+
+class Keymap:
+    def __init__(self):
+        self.bindings = {}
+        self.sections = {}
+        self.problems = []
+
+    def add(self, binding, section="keys"):
+        key = combo(binding.modifiers, binding.key)
+        old = self.bindings.get(key)
+        if old is not None:
+            kind = "duplicate" if _same_commands(old, binding) else "shadowed"
+            self.problems.append((kind, key, old, self.sections[key], binding, section))
+            # qtile keeps the last binding for a combination, so do we
+            del self.bindings[key]
+        self.bindings[key] = binding
+        self.sections[key] = section
+
+    def extend(self, bindings, section="keys"):
+        for binding in bindings:
+            self.add(binding, section)
+
+    def add_groups(self, mod, names, spec, section="groups"):
+        """Bind every group name from `spec`, a list of (extra modifiers,
+        command factory taking the group name, description format)."""
+        from libqtile.config import Key
+
+        for name in names:
+            for extra, command, desc in spec:
+                self.add(
+                    Key([mod, *extra], name, command(name), desc=desc.format(name)),
+                    section,
+                )
+
+    def lookup(self, modifiers, key):
+        return self.bindings.get(combo(modifiers, key))
+
+    def report(self):
+        lines = []
+        for kind, key, old, old_section, new, new_section in self.problems:
+            verb = "bound again to" if kind == "duplicate" else "shadowed by"
+            lines.append(
+                f"{format_combo(key)}: {describe(old)!r} ({old_section}) {verb} "
+                f"{describe(new)!r} ({new_section})"
+            )
+        return lines
+
+    def compile(self):
+        for line in self.report():
+            logger.warning("keymap: %s", line)
+        return list(self.bindings.values())
+
+    def dump(self):
+        """Cheat-sheet text, one line per binding, grouped by section."""
+        by_section = {}
+        for key, binding in self.bindings.items():
+            by_section.setdefault(self.sections[key], []).append((format_combo(key), binding))
+        lines = []
+        for section, rows in by_section.items():
+            lines.append(f"{section}:")
+            width = max(len(c) for c, _ in rows)
+            for text, binding in rows:
+                lines.append(f"  {text:<{width}}  {describe(binding)}")
+        return "\n".join(lines)
+
+
+def format_combo(key):
+    modifiers, name = key
+    order = ("mod4", "control", "mod1", "shift")
+    mods = sorted(modifiers, key=lambda m: order.index(m) if m in order else len(order))
+    return "+".join([MODIFIER_NAMES.get(m, m) for m in mods] + [name])
+
+
+if __name__ == "__main__":
+    from types import SimpleNamespace
+
+    import bindings
+
+    # the bindings only keep references to these, nothing is called
+    stand_in = SimpleNamespace(terminal=None, launch=None, toggle=None, reload=None)
+    keymap = bindings.make_keymap(stand_in, stand_in, stand_in)
+    print(keymap.dump())
+    problems = keymap.report()
+    for line in problems:
+        print("!", line)
+    raise SystemExit(1 if problems else 0)
@@ -0,0 +1,279 @@
+# Per-group layout state across restarts and reloads.
+#
+# qtile keeps each group's current layout (by name) over a restart or a
+# reload_config, but not the ratios (MonadTall main pane, Tile master count,
+# Columns widths) or the window order in the layouts. snapshot() reads
+# them from the running groups: the current layout index, the PARAMS of
+# each layout and the window ids in layout order. save() writes that as
+# one small JSON file from a thread (writes are serialized, and a stale
+# snapshot never overwrites a newer one, also across a reload_config),
+# restore() puts it back into the groups and lays them out again; windows
+# that no longer exist are skipped, new ones go after the known ones.
+#
+# It is saved on shutdown and on restart (a restart fires the restart hook,
+# not shutdown) and restored at startup_complete. reload_config goes through
+# reload(), which takes the snapshot first and applies it to the
+# reconfigured groups:
+#
+#   layout_state = LayoutState(exclude=("scratchpad",))
+#   layout_state.install()
+#   Key([mod, "control"], "r", lazy.function(layout_state.reload))
+#
+#   python layoutstate.py    # snapshot/save/restore timing on fake groups
+
+import json
+import os
+import threading
+import time
+
+from libqtile.log_utils import logger
+
+from keep import kept
+from qtcompat import command
+
+STATE = os.path.expanduser("~/.cache/qtile/layouts.json")
+VERSION = 1
+
+# one lock for the writers of every LayoutState, including the one from
+# before a reload_config whose thread may still be running
+_write_lock = kept("layoutstate.lock", threading.Lock)
+# snapshots handed to writers, and the newest one on disk
+_seq = kept("layoutstate.seq", lambda: {"taken": 0, "written": 0})
+
+# layout class -> attributes worth keeping
+PARAMS = {
+    "MonadTall": ("ratio", "align", "relative_sizes"),
+    "MonadWide": ("ratio", "align", "relative_sizes"),
+    "MonadThreeCol": ("ratio", "align", "relative_sizes"),
+    "Tile": ("ratio", "master_length"),
+    "Matrix": ("columns",),
+}
+
+
+def _wids(clients):
+    return [w.wid for w in clients]
+
+
+def _reorder(clients, wids):
+    """Put a _ClientList's windows in saved order, keeping the focus."""
+    rank = {wid: i for i, wid in enumerate(wids)}
+    focused = clients.current_client
+    clients.clients.sort(key=lambda w: rank.get(w.wid, len(rank)))
+    if focused is not None:
+        clients.current_client = focused
+
+
+def layout_state(layout):
+    """(params, order) of one layout, both None when there is nothing to keep."""
+    params = None
+    names = PARAMS.get(type(layout).__name__)
+    if names:
+        params = {}
+        for name in names:
+            value = getattr(layout, name, None)
+            params[name] = list(value) if isinstance(value, list) else value
+    columns = getattr(layout, "columns", None)
+    if isinstance(columns, list):
+        # Columns: width, split and windows of every column
+        order = [[c.width, c.split, _wids(c.clients)] for c in columns]
+    elif hasattr(getattr(layout, "clients", None), "clients"):
+        order = _wids(layout.clients.clients)
+    else:
+        order = None
+    return params, order
+
+
+def apply_layout_state(layout, params, order):
+    if params:
+        for name, value in params.items():
+            current = getattr(layout, name, None)
+            # relative_sizes only fits the same number of secondary windows
+            if isinstance(current, list) and len(current) != len(value or ()):
+                continue
+            setattr(layout, name, value)
+    if not order:
+        return
+    columns = getattr(layout, "columns", None)
+    if isinstance(columns, list):
+        if len(columns) != len(order):
+            return
+        for column, (width, split, wids) in zip(columns, order):
+            column.width, column.split = width, split
+            _reorder(column, wids)
+    elif hasattr(getattr(layout, "clients", None), "clients"):
+        _reorder(layout.clients, order)
+
+
+class LayoutState:
+    def __init__(self, path=STATE, exclude=()):
+        self.path = path
+        self.exclude = set(exclude)
+        self._writer = None
+        self.restore_time = None
+
+    def snapshot(self, qtile):
+        state = {}
+        for group in qtile.groups:
+            if group.name in self.exclude:
+                continue
+            layouts = {}
+            for index, layout in enumerate(group.layouts):
+                params, order = layout_state(layout)
+                if params or order:
+                    # JSON object keys are strings
+                    layouts[str(index)] = [params, order]
+            state[group.name] = [group.current_layout, layouts]
+        return state
+
+    def _write(self, state, seq):
+        with _write_lock:
+            if seq <= _seq["written"]:
+                return
+            tmp = self.path + ".tmp"
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(tmp, "w") as f:
+                    json.dump({"version": VERSION, "groups": state}, f, separators=(",", ":"))
+                os.replace(tmp, self.path)
+                _seq["written"] = seq
+            except (OSError, ValueError):
+                logger.exception("layoutstate: can't write %s", self.path)
+
+    def save(self, qtile, wait=False):
+        """Snapshot on the loop (cheap), write from a thread."""
+        state = self.snapshot(qtile)
+        _seq["taken"] += 1
+        self._writer = threading.Thread(target=self._write, args=(state, _seq["taken"]),
+                                        name="layoutstate", daemon=True)
+        self._writer.start()
+        if wait:
+            self._writer.join(timeout=1)
+        return state
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(saved, dict) or saved.get("version") != VERSION:
+            return None
+        return saved.get("groups")
+
+    def restore(self, qtile, state=None):
+        start = time.perf_counter()
+        if state is None:
+            state = self.load()
+        if not state:
+            return
+        for group in qtile.groups:
+            saved = state.get(group.name)
+            if saved is None or group.name in self.exclude:
+                continue
+            index, layouts = saved
+            for i, (params, order) in layouts.items():
+                i = int(i)
+                if i < len(group.layouts):
+                    try:
+                        apply_layout_state(group.layouts[i], params, order)
+                    except Exception:
+                        logger.exception("layoutstate: can't restore %s layout %d",
+                                         group.name, i)
+            if index < len(group.layouts):
+                group.use_layout(index)
+            if group.screen is not None:
+                group.layout_all()
+        self.restore_time = time.perf_counter() - start
+        logger.info("layoutstate: restored in %.2f ms", self.restore_time * 1000)
+
+    def reload(self, qtile):
+        state = self.save(qtile)
+        command(qtile, "reload_config")()
+        self.restore(qtile, state)
+
+    def install(self):
+        from libqtile import hook, qtile
+
+        @hook.subscribe.startup_complete
+        def restore_layouts():
+            self.restore(qtile)
+
+        @hook.subscribe.shutdown
+        def save_layouts():
+            # the process is about to exit or exec, the thread has to finish first
+            self.save(qtile, wait=True)
+
+        hook.subscribe.restart(save_layouts)
+
+
+def _bench(groups=8, windows=6, rounds=200):
+    import tempfile
+
+    class ClientList:
+        def __init__(self, clients):
+            self.clients = clients
+            self.current_client = clients[0] if clients else None
+
+    class Window:
+        def __init__(self, wid):
+            self.wid = wid
+
+    class Layout:
+        def __init__(self, clients):
+            self.clients = ClientList(list(clients))
+
+    MonadTall = type("MonadTall", (Layout,), {})
+    Tile = type("Tile", (Layout,), {})
+
+    class Group:
+        def __init__(self, name, wins):
+            self.name = name
+            self.screen = None
+            monad = MonadTall(wins)
+            monad.ratio, monad.align = 0.6, 0
+            monad.relative_sizes = [1 / (len(wins) - 1)] * (len(wins) - 1)
+            tile = Tile(wins)
+            tile.ratio, tile.master_length = 0.55, 2
+            self.layouts = [Layout(wins), monad, tile]
+            self.current_layout = 1
+
+        def use_layout(self, index):
+            self.current_layout = index
+
+    class Qtile:
+        def __init__(self):
+            self.groups = [
+                Group(str(g + 1), [Window(g * 100 + w) for w in range(windows)])
+                for g in range(groups)
+            ]
+
+    qtile = Qtile()
+    state = LayoutState(path=os.path.join(tempfile.mkdtemp(), "layouts"))
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        state.snapshot(qtile)
+    snap = (time.perf_counter() - start) / rounds
+    state.save(qtile, wait=True)
+
+    fresh = Qtile()
+    for group in fresh.groups:
+        group.layouts[1].ratio = 0.5
+        group.layouts[1].clients.clients.reverse()
+        group.current_layout = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        state.restore(fresh)
+    restore = (time.perf_counter() - start) / rounds
+    assert state.snapshot(fresh) == state.snapshot(qtile)
+
+    print(f"{groups} groups x {windows} windows, {os.path.getsize(state.path)} bytes on disk")
+    print(f"  snapshot (on the loop): {snap * 1000:.3f} ms")
+    print(f"  load + restore:         {restore * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    import logging
+
+    logging.disable(logging.INFO)
+    _bench()
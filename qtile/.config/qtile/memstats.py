@@ -0,0 +1,198 @@
+# Memory usage and pressure.
+#
+# widget.Memory split the whole of /proc/meminfo into a dict every tick to
+# use two lines of it. MemoryProbe keeps /proc/meminfo and
+# /proc/pressure/memory open, re-reads them into the same bytearray each
+# tick and picks the few numbers it needs straight out of the buffer at
+# offsets found on the first read (the field order is fixed per kernel).
+#
+# The "mem" section of the sampler snapshot has:
+#
+#   MemTotal MemUsed SwapTotal SwapUsed   kB
+#   MemPercent SwapPercent                one decimal
+#   psi            True if the kernel has PSI (CONFIG_PSI)
+#   some10 some60  % of time some task stalled on memory, 10 s / 60 s avg
+#   full10 full60  % of time all non-idle tasks stalled on memory
+#
+# Pressure is the figure that predicts stalls; the bar turns the memory text
+# to its alert colour on `some10` (see SampledText's `alert`).
+#
+#   python memstats.py    # parse check on a PSI sample, per-tick cost against
+#                         # the dict parse
+
+import os
+
+MEMINFO_FIELDS = (b"MemTotal:", b"MemAvailable:", b"SwapTotal:", b"SwapFree:")
+# (line, field): the averages are named the same on the some and full lines
+PSI_FIELDS = (
+    (b"some ", b" avg10="), (b"some ", b" avg60="),
+    (b"full ", b" avg10="), (b"full ", b" avg60="),
+)
+
+
+def _number(buf, pos, end):
+    """Integer at `pos` of `buf`, leading spaces skipped."""
+    while pos < end and buf[pos] == 32:
+        pos += 1
+    value = 0
+    while pos < end and 48 <= buf[pos] <= 57:
+        value = value * 10 + buf[pos] - 48
+        pos += 1
+    return value
+
+
+def _decimal(buf, pos, end):
+    """PSI average like "12.34" at `pos` of `buf`."""
+    value = _number(buf, pos, end)
+    while pos < end and buf[pos] != 46:
+        pos += 1
+    scale = 0.1
+    pos += 1
+    while pos < end and 48 <= buf[pos] <= 57:
+        value += (buf[pos] - 48) * scale
+        scale /= 10
+        pos += 1
+    return value
+
+
+class _Fields:
+    """One /proc file read into a reused buffer, values at cached offsets.
+
+    A field is a prefix such as b"MemTotal:", or a (line, field) pair for a
+    field searched for from the start of the line beginning with `line`.
+    """
+
+    def __init__(self, path, fields, size=8192):
+        self.path = path
+        self.fields = fields
+        # what must precede each cached offset
+        self.keys = [f[-1] if isinstance(f, tuple) else f for f in fields]
+        self.buf = bytearray(size)
+        self.offsets = None
+        self._file = None
+
+    def fill(self):
+        """Re-read the file, returns the byte count or 0 if it can't be read."""
+        try:
+            if self._file is None:
+                self._file = open(self.path, "rb", buffering=0)
+            self._file.seek(0)
+            return self._file.readinto(self.buf)
+        except OSError:
+            self.close()
+            return 0
+
+    def locate(self, end):
+        offsets = self.offsets
+        if offsets is not None and all(
+            o < 0 or self.buf.startswith(k, o - len(k), end) for k, o in zip(self.keys, offsets)
+        ):
+            return offsets
+        offsets = []
+        for field in self.fields:
+            start = 0
+            if isinstance(field, tuple):
+                line, field = field
+                start = self.buf.find(line, 0, end)
+            at = self.buf.find(field, start, end) if start >= 0 else -1
+            offsets.append(at + len(field) if at >= 0 else -1)
+        self.offsets = offsets
+        return offsets
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class MemoryProbe:
+    """Memory, swap and memory pressure, values in kB and percent."""
+
+    def __init__(self, root="/"):
+        self.meminfo = _Fields(os.path.join(root, "proc/meminfo"), MEMINFO_FIELDS)
+        self.pressure = _Fields(os.path.join(root, "proc/pressure/memory"), PSI_FIELDS, 512)
+        self._result = {
+            "MemTotal": 0, "MemUsed": 0, "MemPercent": 0.0,
+            "SwapTotal": 0, "SwapUsed": 0, "SwapPercent": 0.0,
+            "psi": False, "some10": 0.0, "some60": 0.0, "full10": 0.0, "full60": 0.0,
+        }
+
+    def read(self):
+        result = self._result
+        end = self.meminfo.fill()
+        if end:
+            buf = self.meminfo.buf
+            total, available, swap_total, swap_free = (
+                _number(buf, o, end) if o >= 0 else 0 for o in self.meminfo.locate(end)
+            )
+            used = total - available
+            swap_used = swap_total - swap_free
+            result["MemTotal"], result["MemUsed"] = total, used
+            result["MemPercent"] = round(used / total * 100, 1) if total else 0.0
+            result["SwapTotal"], result["SwapUsed"] = swap_total, swap_used
+            result["SwapPercent"] = round(swap_used / swap_total * 100, 1) if swap_total else 0.0
+
+        end = self.pressure.fill()
+        result["psi"] = bool(end)
+        if end:
+            buf = self.pressure.buf
+            (result["some10"], result["some60"],
+             result["full10"], result["full60"]) = (
+                _decimal(buf, o, end) if o >= 0 else 0.0 for o in self.pressure.locate(end)
+            )
+        return result
+
+
+def _bench(ticks=5000):
+    import time
+
+    def dict_parse():
+        # what widget.Memory does (through psutil) / the old sampler probe
+        with open("/proc/meminfo") as f:
+            info = {}
+            for line in f.read().splitlines():
+                key, _, rest = line.partition(":")
+                info[key] = int(rest.split()[0])
+        total = info["MemTotal"]
+        return (total - info["MemAvailable"]) / total * 100
+
+    def timed(label, fn):
+        fn()
+        start = time.perf_counter()
+        for _ in range(ticks):
+            fn()
+        per_tick = (time.perf_counter() - start) / ticks * 1e6
+        print(f"  {label:36} {per_tick:8.1f} us/tick")
+
+    probe = MemoryProbe()
+    print(f"{ticks} ticks")
+    timed("dict of all of /proc/meminfo", dict_parse)
+    timed("MemoryProbe.read (meminfo + PSI)", probe.read)
+    print(probe.read())
+
+
+def _check():
+    """Parse a real /proc/pressure/memory sample."""
+    import tempfile
+
+    root = tempfile.mkdtemp()
+    os.makedirs(os.path.join(root, "proc/pressure"))
+    with open(os.path.join(root, "proc/meminfo"), "w") as f:
+        f.write("MemTotal:       16000000 kB\nMemFree:         1000000 kB\n"
+                "MemAvailable:    4000000 kB\nSwapTotal:       2000000 kB\n"
+                "SwapFree:        1500000 kB\n")
+    with open(os.path.join(root, "proc/pressure/memory"), "w") as f:
+        f.write("some avg10=1.53 avg60=12.07 avg300=3.25 total=4785437\n"
+                "full avg10=0.50 avg60=6.20 avg300=1.10 total=2195812\n")
+    probe = MemoryProbe(root)
+    for _ in range(2):  # located, then from the cached offsets
+        result = probe.read()
+        assert result["MemPercent"] == 75.0 and result["SwapUsed"] == 500000, result
+        got = [round(result[k], 2) for k in ("some10", "some60", "full10", "full60")]
+        assert got == [1.53, 12.07, 0.5, 6.2], got
+    print("PSI sample parsed:", got)
+
+
+if __name__ == "__main__":
+    _check()
+    _bench()
@@ -0,0 +1,131 @@
+# Event-driven media status for the bar.
+#
+# widget.Mpris2 with interval=0.1 wakes the bar ten times a second even when
+# spotify is paused or closed. This widget has no timer at all: it listens for
+# PropertiesChanged on the player object and only redraws when the visible
+# text (title, artist or playback state) actually changes.
+
+from dbus_next.constants import MessageType
+from libqtile.log_utils import logger
+from libqtile.utils import _send_dbus_message, add_signal_receiver
+from libqtile.widget import base
+
+MPRIS_PATH = "/org/mpris/MediaPlayer2"
+PLAYER_IFACE = "org.mpris.MediaPlayer2.Player"
+PROPS_IFACE = "org.freedesktop.DBus.Properties"
+
+
+def _unwrap(value):
+    # dbus_next hands us Variants, the fake service and tests plain values
+    return getattr(value, "value", value)
+
+
+class MprisState:
+    """Holds the last known player state and renders it to a single string."""
+
+    def __init__(self, fmt="{title} - {artist}", stop_pause_text=""):
+        self.fmt = fmt
+        self.stop_pause_text = stop_pause_text
+        self.title = ""
+        self.artist = ""
+        self.status = "Stopped"
+        self.text = ""
+
+    def apply(self, changed):
+        """Merge a PropertiesChanged payload. Returns True if the text changed."""
+        if "Metadata" in changed:
+            meta = {k: _unwrap(v) for k, v in _unwrap(changed["Metadata"]).items()}
+            self.title = meta.get("xesam:title", "") or ""
+            artist = meta.get("xesam:artist", "") or ""
+            self.artist = ", ".join(artist) if isinstance(artist, list) else artist
+        if "PlaybackStatus" in changed:
+            self.status = _unwrap(changed["PlaybackStatus"])
+        return self._render()
+
+    def clear(self):
+        self.title = self.artist = ""
+        self.status = "Stopped"
+        return self._render()
+
+    def _render(self):
+        if self.status != "Playing" or not self.title:
+            text = self.stop_pause_text
+        else:
+            text = self.fmt.format(title=self.title, artist=self.artist).strip(" -")
+        if text == self.text:
+            return False
+        self.text = text
+        return True
+
+
+class Mpris(base._TextBox):
+    """Spotify (or any MPRIS player) status driven purely by D-Bus signals."""
+
+    defaults = [
+        ("objname", "org.mpris.MediaPlayer2.spotify", "D-Bus name of the player"),
+        ("format", "{title} - {artist}", "Text format, {title} and {artist} available"),
+        ("stop_pause_text", "", "Text shown while paused, stopped or closed"),
+    ]
+
+    def __init__(self, **config):
+        base._TextBox.__init__(self, "", **config)
+        self.add_defaults(Mpris.defaults)
+        self.state = MprisState(self.format, self.stop_pause_text)
+        # number of redraws requested, handy to check the wakeup rate
+        self.redraws = 0
+
+    async def _config_async(self):
+        await add_signal_receiver(
+            self._properties_changed,
+            session_bus=True,
+            signal_name="PropertiesChanged",
+            bus_name=self.objname,
+            path=MPRIS_PATH,
+            dbus_interface=PROPS_IFACE,
+        )
+        await add_signal_receiver(
+            self._name_owner_changed,
+            session_bus=True,
+            signal_name="NameOwnerChanged",
+            dbus_interface="org.freedesktop.DBus",
+        )
+        await self._fetch_initial()
+
+    async def _fetch_initial(self):
+        bus, msg = await _send_dbus_message(
+            True, MessageType.METHOD_CALL, self.objname, PROPS_IFACE,
+            MPRIS_PATH, "GetAll", "s", [PLAYER_IFACE],
+        )
+        if bus:
+            bus.disconnect()
+        # an ERROR reply (player not running) has the error text as its body
+        if msg is None or msg.message_type != MessageType.METHOD_RETURN or not msg.body:
+            return
+        self._apply(msg.body[0])
+
+    def _properties_changed(self, message):
+        if message.message_type != MessageType.SIGNAL:
+            return
+        interface, changed, _invalidated = message.body
+        if interface != PLAYER_IFACE:
+            return
+        self._apply(changed)
+
+    def _name_owner_changed(self, message):
+        if message.message_type != MessageType.SIGNAL:
+            return
+        name, _old, new = message.body
+        if name == self.objname and not new:
+            self._redraw(self.state.clear())
+
+    def _apply(self, changed):
+        try:
+            self._redraw(self.state.apply(changed))
+        except Exception:
+            logger.exception("Mpris: unable to parse player properties")
+
+    def _redraw(self, changed):
+        if not changed:
+            return
+        self.redraws += 1
+        self.update(self.state.text)
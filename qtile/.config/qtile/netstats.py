@@ -0,0 +1,166 @@
+# Network rates with per-interface history.
+#
+# The old NetProbe summed /proc/net/dev into a fresh dict and fresh strings
+# every tick and forgot everything in between. NetProbe here keeps the raw
+# counters and a Ring of rates per interface, so rates, moving averages and
+# the history for a sparkline come from preallocated arrays; the snapshot
+# dict is reused and its strings are only formatted again when the value
+# they show changed.
+#
+# Docking churns interfaces (eth0 appears, wlan0 may drop): a new interface
+# starts with a baseline reading instead of a bogus spike, and one that
+# disappears keeps its history for `forget_after` seconds in case it comes
+# straight back. Counters that go backwards are 32-bit wraps when they can
+# be, and resets (driver reload, interface re-created) otherwise.
+#
+#   python netstats.py    # wrap/churn walk-through on a fake /proc
+
+import os
+import time
+
+from history import Ring, human_bytes, sparkline
+
+WRAP_32 = 1 << 32
+
+
+def counter_delta(last, now):
+    """Bytes between two readings of a counter, handling wrap and reset."""
+    if now >= last:
+        return now - last
+    if last < WRAP_32 and now + WRAP_32 - last < WRAP_32 // 2:
+        return now + WRAP_32 - last
+    # reset: count from zero
+    return now
+
+
+class Interface:
+    __slots__ = ("rx", "tx", "seen", "down", "up")
+
+    def __init__(self, rx, tx, now, size):
+        self.rx, self.tx, self.seen = rx, tx, now
+        self.down = Ring(size)
+        self.up = Ring(size)
+
+
+class NetProbe:
+    """Summed rx/tx rates over all non-ignored interfaces of /proc/net/dev."""
+
+    def __init__(self, root="/", prefix=None, history=60, ignore=("lo",),
+                 forget_after=300, clock=time.monotonic):
+        self.path = os.path.join(root, "proc/net/dev")
+        self.prefix = prefix
+        self.history = history
+        self.ignore = tuple(ignore)
+        self.forget_after = forget_after
+        self.clock = clock
+        self.interfaces = {}
+        self.down = Ring(history)
+        self.up = Ring(history)
+        self._last = None
+        self._result = {"down": "", "up": "", "down_bytes": 0.0, "up_bytes": 0.0,
+                        "down_avg": 0.0, "up_avg": 0.0, "interfaces": ()}
+        self._shown = (None, None)
+
+    def _counters(self):
+        with open(self.path, "rb") as f:
+            lines = f.read().splitlines()[2:]
+        for line in lines:
+            name, _, data = line.partition(b":")
+            name = name.strip().decode()
+            if name.startswith(self.ignore):
+                continue
+            cols = data.split()
+            yield name, int(cols[0]), int(cols[8])
+
+    def read(self):
+        now = self.clock()
+        ticked = self._last is not None and now > self._last
+        self._last = now
+        down = up = 0.0
+        present = []
+        for name, rx, tx in self._counters():
+            present.append(name)
+            iface = self.interfaces.get(name)
+            if iface is None:
+                self.interfaces[name] = Interface(rx, tx, now, self.history)
+                continue
+            # since this interface's own last reading: it may have been
+            # away for a while
+            elapsed = now - iface.seen
+            if elapsed > 0:
+                d = counter_delta(iface.rx, rx) / elapsed
+                u = counter_delta(iface.tx, tx) / elapsed
+                iface.down.push(d)
+                iface.up.push(u)
+                down += d
+                up += u
+            iface.rx, iface.tx, iface.seen = rx, tx, now
+        for name in [n for n, i in self.interfaces.items() if now - i.seen > self.forget_after]:
+            del self.interfaces[name]
+        if ticked:
+            self.down.push(down)
+            self.up.push(up)
+
+        result = self._result
+        result["down_bytes"], result["up_bytes"] = down, up
+        result["down_avg"], result["up_avg"] = self.down.average(), self.up.average()
+        if tuple(present) != result["interfaces"]:
+            result["interfaces"] = tuple(present)
+        shown = (round(down, -2), round(up, -2))
+        if shown != self._shown:
+            self._shown = shown
+            result["down"] = human_bytes(down, self.prefix)
+            result["up"] = human_bytes(up, self.prefix)
+        return result
+
+    def rates(self, interface=None, direction="down"):
+        """Rate history, oldest first, of one interface or of the total."""
+        if interface is None:
+            return getattr(self, direction)
+        iface = self.interfaces.get(interface)
+        return getattr(iface, direction) if iface is not None else ()
+
+    def sparkline(self, width=None, interface=None, direction="down"):
+        return sparkline(self.rates(interface, direction), width or self.history)
+
+
+def _demo():
+    import tempfile
+
+    now = [0.0]
+    with tempfile.TemporaryDirectory() as root:
+        os.makedirs(os.path.join(root, "proc/net"))
+
+        def write(**ifaces):
+            lines = ["Inter-|   Receive", " face |bytes"]
+            for name, (rx, tx) in ifaces.items():
+                lines.append(f"{name:>6}: {rx} 0 0 0 0 0 0 0 {tx} 0 0 0 0 0 0 0")
+            with open(os.path.join(root, "proc/net/dev"), "w") as f:
+                f.write("\n".join(lines) + "\n")
+
+        probe = NetProbe(root, prefix="k", history=8, forget_after=10, clock=lambda: now[0])
+        steps = [
+            ("start", dict(lo=(5, 5), wlan0=(WRAP_32 - 3000, 1000))),
+            ("32-bit wrap", dict(lo=(5, 5), wlan0=(2000, 2000))),
+            ("dock: eth0 appears", dict(lo=(5, 5), wlan0=(7000, 3000), eth0=(10 ** 9, 500))),
+            ("eth0 traffic", dict(lo=(5, 5), wlan0=(7000, 3000), eth0=(10 ** 9 + 50000, 1500))),
+            ("wlan0 drops", dict(lo=(5, 5), eth0=(10 ** 9 + 90000, 2500))),
+            ("eth0 reset", dict(lo=(5, 5), eth0=(4000, 100))),
+            # 60000 bytes over the 15 s since wlan0 was last read: 4 kB/s
+            ("wlan0 back", dict(lo=(5, 5), eth0=(4000, 100), wlan0=(67000, 3000))),
+        ]
+        for label, ifaces in steps:
+            write(**ifaces)
+            now[0] += 5
+            r = probe.read()
+            print(f"{label:20} down {r['down']:>8} avg {r['down_avg']:8.0f} B/s "
+                  f"{','.join(r['interfaces'])}")
+        print("total down:", probe.sparkline())
+        for _ in range(3):
+            now[0] += 5
+            probe.read()
+        print("remembered:", sorted(probe.interfaces))
+
+
+if __name__ == "__main__":
+    _demo()
@@ -0,0 +1,234 @@
+# Learned app -> group placement.
+#
+# dgroups_app_rules is empty, so every window opens on the current group and
+# gets moved by hand with mod+shift+N. Placement counts, per wm_class, the
+# group its windows end up on (the group a window is on when it closes, or
+# at shutdown or restart) and, once one group has a clear majority, sends new windows
+# of that class there right away.
+#
+# The table is {wm_class: {group: count}} plus the current best group per
+# class, kept up to date on every count, so placing a window is one dict
+# lookup. Counts are halved when a class reaches MAX_COUNT, which keeps the
+# file small and lets a habit change win within a few days. The file is
+# written at most once per `delay` seconds, in a worker thread, after
+# something changed. The table itself is kept across reload_config (see
+# keep.py), so counts not written yet carry over to the new config.
+#
+# Transient windows (file pickers, confirm boxes) and floating dialog types
+# stay with their parent: they are neither placed nor counted.
+#
+#   placement = Placement([g.name for g in groups], rules=window_rules)
+#   placement.install()
+#
+#   python placement.py      # lookup cost and a simulated week of learning
+
+import json
+import os
+import threading
+
+from libqtile.log_utils import logger
+
+from keep import kept
+from qtcompat import command
+
+STATE = os.path.expanduser("~/.cache/qtile/placement.json")
+MAX_COUNT = 64
+DIALOG_TYPES = ("dialog", "utility", "toolbar", "splash", "notification")
+
+# path -> counts, shared with the Placement from before a reload_config
+_tables = kept("placement.tables")
+_write_lock = kept("placement.lock", threading.Lock)
+
+
+def wm_class_of(window):
+    classes = window.get_wm_class() or []
+    return classes[-1] if classes else None
+
+
+def is_dialog(window):
+    """Transient for another window, or of a floating dialog type."""
+    transient = getattr(window, "is_transient_for", None)
+    if transient is not None and transient() is not None:
+        return True
+    wm_type = getattr(window, "get_wm_type", None)
+    return wm_type is not None and wm_type() in DIALOG_TYPES
+
+
+class Placement:
+    def __init__(self, groups, path=STATE, threshold=0.75, min_count=3, delay=30,
+                 exclude=("scratch",), rules=None):
+        self.groups = set(groups)
+        self.path = path
+        self.threshold = threshold
+        self.min_count = min_count
+        self.delay = delay
+        self.exclude = set(exclude)
+        # windows a rule already sends somewhere are left alone
+        self.rules = rules
+        self.best = {}
+        self.moved = 0
+        self._pending = None
+        self.counts = _tables.get(path)
+        if self.counts is None:
+            self.counts = _tables[path] = self.load()
+        for cls in self.counts:
+            self._update_best(cls)
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                counts = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(counts, dict):
+            return {}
+        return {
+            cls: {g: int(n) for g, n in per_group.items() if g in self.groups}
+            for cls, per_group in counts.items() if isinstance(per_group, dict)
+        }
+
+    def _update_best(self, cls):
+        per_group = self.counts.get(cls)
+        total = sum(per_group.values()) if per_group else 0
+        if total < self.min_count:
+            self.best.pop(cls, None)
+            return
+        group, count = max(per_group.items(), key=lambda item: item[1])
+        if count / total >= self.threshold:
+            self.best[cls] = group
+        else:
+            self.best.pop(cls, None)
+
+    def record(self, cls, group):
+        if cls is None or cls in self.exclude or group not in self.groups:
+            return
+        per_group = self.counts.setdefault(cls, {})
+        per_group[group] = per_group.get(group, 0) + 1
+        if per_group[group] >= MAX_COUNT:
+            for g in list(per_group):
+                per_group[g] //= 2
+                if not per_group[g]:
+                    del per_group[g]
+        self._update_best(cls)
+        self._schedule_save()
+
+    def target(self, window):
+        """Group to open `window` on, None to leave it where it is."""
+        cls = wm_class_of(window)
+        if cls is None or cls in self.exclude or is_dialog(window):
+            return None
+        return self.best.get(cls)
+
+    def _schedule_save(self):
+        from libqtile import qtile
+
+        if self._pending is None and qtile is not None:
+            self._pending = qtile.call_later(self.delay, self._save_soon)
+
+    def _save_soon(self):
+        import asyncio
+
+        self._pending = None
+        data = json.dumps(self.counts, separators=(",", ":"), sort_keys=True)
+        asyncio.get_event_loop().run_in_executor(None, self._write, data)
+
+    def _write(self, data):
+        tmp = self.path + ".tmp"
+        with _write_lock:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(tmp, "w") as f:
+                    f.write(data)
+                os.replace(tmp, self.path)
+            except OSError:
+                logger.exception("placement: can't write %s", self.path)
+
+    def flush(self):
+        """Write now, synchronously (shutdown)."""
+        if self._pending is not None:
+            self._pending.cancel()
+            self._pending = None
+        self._write(json.dumps(self.counts, separators=(",", ":"), sort_keys=True))
+
+    def install(self):
+        from libqtile import hook, qtile
+
+        @hook.subscribe.client_new
+        def place(window):
+            if self.rules is not None:
+                # decided once by the RuleSet's own client_new hook
+                floating, group, _ = self.rules.decision(window)
+                # a rule places it, or floats it (dialogs, pickers)
+                if floating or group is not None:
+                    return
+            group = self.target(window)
+            if group is not None and group in qtile.groups_map:
+                current = window.group.name if window.group else qtile.current_group.name
+                if group != current:
+                    command(window, "togroup")(group)
+                    self.moved += 1
+
+        @hook.subscribe.client_killed
+        def learn(window):
+            if window.group is not None and not is_dialog(window):
+                self.record(wm_class_of(window), window.group.name)
+
+        @hook.subscribe.shutdown
+        def learn_open_windows():
+            for group in qtile.groups:
+                for window in group.windows:
+                    if not is_dialog(window):
+                        self.record(wm_class_of(window), group.name)
+            self.flush()
+
+        # a restart fires only its own hook
+        hook.subscribe.restart(learn_open_windows)
+
+
+def _bench(classes=200, lookups=100000):
+    import random
+    import tempfile
+    import time
+
+    class Window:
+        def __init__(self, wm_class):
+            self._class = [wm_class.lower(), wm_class]
+
+        def get_wm_class(self):
+            return self._class
+
+    rng = random.Random(1)
+    groups = [str(i) for i in range(1, 9)]
+    homes = {f"App{i}": rng.choice(groups) for i in range(classes)}
+    path = os.path.join(tempfile.mkdtemp(), "placement.json")
+    placement = Placement(groups, path=path)
+    placement._schedule_save = lambda: None
+
+    # a user who puts each app on its home group 90% of the time
+    placed = right = 0
+    for _ in range(20 * classes):
+        cls = rng.choice(list(homes))
+        guess = placement.best.get(cls)
+        group = homes[cls] if rng.random() < 0.9 else rng.choice(groups)
+        if guess is not None:
+            placed += 1
+            right += guess == group
+        placement.record(cls, group)
+    print(f"{placed} of {20 * classes} windows placed automatically, "
+          f"{right / max(placed, 1):.0%} on the group they ended up on")
+
+    windows = [Window(rng.choice(list(homes))) for _ in range(1000)]
+    start = time.perf_counter()
+    for i in range(lookups):
+        placement.target(windows[i % 1000])
+    took = time.perf_counter() - start
+    print(f"lookup: {took / lookups * 1e6:.2f} us/window ({len(placement.best)} classes known)")
+
+    start = time.perf_counter()
+    placement.flush()
+    took = time.perf_counter() - start
+    print(f"write: {os.path.getsize(path)} bytes in {took * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    _bench()
@@ -0,0 +1,269 @@
+# Battery state pushed on power_supply events instead of timed polling.
+#
+# widget.Battery and widget.BatteryIcon each polled /sys/class/power_supply
+# on their own interval. BatterySource is the one reader for both: it is a
+# Sampler source (see sampler.py), so the battery text and the battery icon
+# get the same reading and the bar is drawn once per change.
+#
+# Plugging and unplugging the charger, and most capacity steps, reach us as
+# kernel uevents on a NETLINK_KOBJECT_UEVENT socket (no udev daemon or
+# pyudev needed); sysfs attributes themselves do not support inotify. Not
+# every battery reports capacity changes, so a poll keeps running as a
+# safety net, adapted to the state: slow on AC, faster when discharging,
+# fastest when low. Without the socket (containers, non-Linux) the poll is
+# all there is.
+#
+# Everything is read relative to `root`, so a fake tree works:
+#
+#   python power.py        # adaptive polling + uevent demo on a fake sysfs
+
+import os
+import socket
+
+from libqtile.log_utils import logger
+
+POWER_SUPPLY = "sys/class/power_supply"
+NETLINK_KOBJECT_UEVENT = 15
+
+# (seconds) poll intervals per state
+ON_AC = 120
+DISCHARGING = 30
+LOW = 10
+LOW_PERCENT = 0.15
+
+MISSING = {"present": False, "percent": 0.0, "status": "Unknown", "on_ac": True}
+
+
+def _read(path):
+    with open(path) as f:
+        return f.read().strip()
+
+
+def read_battery(root="/"):
+    """First battery under /sys/class/power_supply, plus whether AC is online."""
+    base_dir = os.path.join(root, POWER_SUPPLY)
+    try:
+        supplies = sorted(os.listdir(base_dir))
+    except OSError:
+        return dict(MISSING)
+    battery = None
+    mains = None
+    for name in supplies:
+        path = os.path.join(base_dir, name)
+        try:
+            kind = _read(os.path.join(path, "type"))
+            if kind == "Mains" and mains is None:
+                mains = _read(os.path.join(path, "online")) == "1"
+            elif kind == "Battery" and battery is None:
+                battery = _battery(path)
+        except (OSError, ValueError):
+            continue
+    if battery is None:
+        return dict(MISSING)
+    if mains is None:
+        mains = battery["status"] != "Discharging"
+    battery["on_ac"] = mains
+    return battery
+
+
+def _battery(path):
+    status = _read(os.path.join(path, "status"))
+    try:
+        percent = int(_read(os.path.join(path, "capacity"))) / 100
+    except OSError:
+        # some firmware only exposes energy_* or charge_*
+        for now, full in (("energy_now", "energy_full"), ("charge_now", "charge_full")):
+            try:
+                percent = int(_read(os.path.join(path, now))) / int(_read(os.path.join(path, full)))
+                break
+            except (OSError, ZeroDivisionError):
+                continue
+        else:
+            raise
+    return {"present": True, "percent": min(percent, 1.0), "status": status}
+
+
+def poll_interval(battery):
+    if not battery["present"] or battery["on_ac"]:
+        return ON_AC
+    if battery["percent"] <= LOW_PERCENT:
+        return LOW
+    return DISCHARGING
+
+
+def uevent_socket():
+    """Non-blocking socket receiving kernel uevents, None if unavailable."""
+    try:
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_KOBJECT_UEVENT)
+        sock.bind((0, 1))  # multicast group 1: kernel uevents
+    except (AttributeError, OSError):
+        return None
+    sock.setblocking(False)
+    return sock
+
+
+def is_power_supply_event(message):
+    # "change@/devices/.../power_supply/BAT0\0ACTION=change\0SUBSYSTEM=power_supply\0..."
+    return b"\0SUBSYSTEM=power_supply\0" in message + b"\0"
+
+
+class BatterySource:
+    """Sampler source for the "battery" section."""
+
+    def __init__(self, root="/", uevents=None):
+        self.root = root
+        # real uevents only describe the real /sys
+        self.uevents = root == "/" if uevents is None else uevents
+        self.state = None
+        self.reads = 0
+        self._sampler = None
+        self._handle = None
+        self._sock = None
+        self._loop = None
+
+    def start(self, sampler):
+        self._sampler = sampler
+        if self.uevents:
+            self._listen()
+        self.refresh()
+
+    def stop(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if self._sock is not None:
+            self._loop.remove_reader(self._sock.fileno())
+            self._sock.close()
+            self._sock = None
+        self._sampler = None
+
+    def _listen(self):
+        import asyncio
+
+        sock = uevent_socket()
+        if sock is None:
+            logger.info("BatterySource: no uevent socket, polling only")
+            return
+        self._loop = asyncio.get_event_loop()
+        self._loop.add_reader(sock.fileno(), self._on_uevent)
+        self._sock = sock
+
+    def _on_uevent(self):
+        relevant = False
+        while True:
+            try:
+                message = self._sock.recv(8192)
+            except BlockingIOError:
+                break
+            except OSError:
+                logger.exception("BatterySource: uevent socket failed")
+                break
+            relevant = relevant or is_power_supply_event(message)
+        if relevant:
+            self.refresh()
+
+    def refresh(self):
+        """Read the battery now, publish it if it changed and re-arm the poll."""
+        if self._sampler is None:
+            return
+        self.reads += 1
+        state = read_battery(self.root)
+        if state != self.state:
+            self.state = state
+            self._sampler.push("battery", state)
+        if self._handle is not None:
+            self._handle.cancel()
+        self._handle = self._sampler.schedule(poll_interval(state), self.refresh)
+
+
+class FakePowerSupply:
+    """Writes a BAT0 + AC tree under `root`/sys/class/power_supply."""
+
+    def __init__(self, root, capacity=80, online=True):
+        self.root = root
+        for name in ("BAT0", "AC"):
+            os.makedirs(os.path.join(root, POWER_SUPPLY, name), exist_ok=True)
+        self._write("BAT0/type", "Battery")
+        self._write("AC/type", "Mains")
+        self.set(capacity, online)
+
+    def _write(self, path, text):
+        with open(os.path.join(self.root, POWER_SUPPLY, path), "w") as f:
+            f.write(text + "\n")
+
+    def set(self, capacity, online):
+        self._write("BAT0/capacity", str(capacity))
+        self._write("AC/online", "1" if online else "0")
+        if online:
+            self._write("BAT0/status", "Full" if capacity >= 100 else "Charging")
+        else:
+            self._write("BAT0/status", "Discharging")
+
+
+def _demo():
+    import heapq
+    import tempfile
+
+    class Clock:
+        def __init__(self):
+            self.now = 0.0
+            self.queue = []
+            self.seq = 0
+
+        def call_later(self, delay, fn):
+            handle = [self.now + delay, self.seq, fn]
+            self.seq += 1
+            heapq.heappush(self.queue, handle)
+
+            class Handle:
+                def cancel(_):
+                    handle[2] = None
+
+            return Handle()
+
+        def run_until(self, t):
+            while self.queue and self.queue[0][0] <= t:
+                when, _, fn = heapq.heappop(self.queue)
+                self.now = when
+                if fn is not None:
+                    fn()
+            self.now = t
+
+    from sampler import Sampler
+
+    with tempfile.TemporaryDirectory() as root:
+        supply = FakePowerSupply(root, capacity=80, online=True)
+        clock = Clock()
+        source = BatterySource(root)
+        sampler = Sampler(root=root, probes={}, sources={"battery": source},
+                          call_later=clock.call_later)
+        seen = []
+
+        def record(snapshot):
+            state = snapshot.get("battery")
+            if state is not None and (not seen or seen[-1][1] != state):
+                seen.append((clock.now, state))
+
+        sampler.subscribe(record)
+
+        clock.run_until(600)
+        print(f"on AC, 10 min:        {source.reads} reads")
+        supply.set(50, False)
+        source.refresh()  # what the uevent for the unplug does
+        before = source.reads
+        clock.run_until(1200)
+        print(f"discharging, 10 min:  {source.reads - before} reads")
+        supply.set(10, False)
+        clock.run_until(1230)
+        before = source.reads
+        clock.run_until(1830)
+        print(f"low, 10 min:          {source.reads - before} reads")
+        print(f"sampler at 5 s would have read {1830 // 5} times")
+        print("published:")
+        for t, state in seen:
+            print(f"  {t:7.1f}s {state}")
+        sampler.unsubscribe(record)
+
+
+if __name__ == "__main__":
+    _demo()
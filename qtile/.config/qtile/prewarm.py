@@ -0,0 +1,179 @@
+# Pre-spawned scratchpad dropdowns.
+#
+# A DropDown only starts its program on the first dropdown_toggle, and
+# obsidian takes seconds to show up. Prewarmer starts the configured
+# dropdowns in the background once the session has settled and hands them
+# to the ScratchPad already hidden (the same path qtile uses to restore
+# hidden dropdowns after a restart), so the first toggle only has to show a
+# window.
+#
+# It waits `delay` seconds after startup and then for the 1-minute load to
+# drop under `idle_load`, starts one dropdown at a time, and stops when the
+# next one would not fit the memory budget: the RSS of everything it has
+# started (process trees, electron apps are several processes; the
+# estimate until its window has been captured) plus the estimate for the
+# next one must stay under `budget_mb`, and MemAvailable
+# must stay above `reserve_mb`.
+#
+# toggle() wraps dropdown_toggle and records toggle-to-visible latency per
+# dropdown, cold (spawned by the toggle) or warm:
+#
+#   Key([mod], "n", lazy.function(prewarmer.toggle, "obsidian"))
+#
+# Every measurement goes to the qtile log; report() sums them up.
+
+import os
+import time
+
+from libqtile.log_utils import logger
+
+from memstats import MemoryProbe
+from qtcompat import command
+
+POLL = 0.01
+GIVE_UP = 15
+
+
+def _children(proc="/proc"):
+    tree = {}
+    for entry in os.listdir(proc):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(os.path.join(proc, entry, "stat"), "rb") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # "pid (comm) state ppid ..." and comm may contain spaces
+        ppid = int(stat[stat.rindex(b")") + 2:].split()[1])
+        tree.setdefault(ppid, []).append(int(entry))
+    return tree
+
+
+def tree_rss_kb(pid, proc="/proc"):
+    """VmRSS of `pid` and all its descendants."""
+    tree = _children(proc)
+    total = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        stack.extend(tree.get(current, ()))
+        try:
+            with open(os.path.join(proc, str(current), "status")) as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return total
+
+
+class Prewarmer:
+    """Starts scratchpad dropdowns hidden, within a memory budget."""
+
+    def __init__(self, scratchpad="scratchpad", estimates_mb=None, enabled=True,
+                 delay=20, idle_load=1.0, budget_mb=700, reserve_mb=1500):
+        self.scratchpad = scratchpad
+        # dropdown name -> expected RSS, in the order to start them
+        self.estimates_mb = dict(estimates_mb or {})
+        self.enabled = enabled
+        self.delay = delay
+        self.idle_load = idle_load
+        self.budget_mb = budget_mb
+        self.reserve_mb = reserve_mb
+        self.started = []  # dropdown names
+        self.latencies = {}  # name -> [(mode, seconds)]
+        self.memory = MemoryProbe()
+        self.qtile = None
+
+    def start(self, qtile):
+        self.qtile = qtile
+        if self.enabled and self.estimates_mb:
+            qtile.call_later(self.delay, self._step)
+
+    def _group(self):
+        return self.qtile.groups_map.get(self.scratchpad)
+
+    def _pid(self, name):
+        # the window ScratchPad captured for the dropdown, once it has mapped
+        dropdown = self._group().dropdowns.get(name)
+        window = getattr(dropdown, "window", None)
+        return window.get_pid() if window is not None else None
+
+    def used_mb(self):
+        kb = 0
+        for name in self.started:
+            pid = self._pid(name)
+            kb += tree_rss_kb(pid) if pid else self.estimates_mb[name] * 1024
+        return kb / 1024
+
+    def _fits(self, name):
+        if self.used_mb() + self.estimates_mb[name] > self.budget_mb:
+            return False
+        memory = self.memory.read()
+        available_mb = (memory["MemTotal"] - memory["MemUsed"]) / 1024
+        return available_mb - self.estimates_mb[name] > self.reserve_mb
+
+    def _step(self):
+        group = self._group()
+        # dropdowns a toggle already started (ScratchPad._spawned, pid -> name)
+        # or captured are left to it
+        spawning = set(group._spawned.values())
+        pending = [n for n in self.estimates_mb
+                   if n not in self.started and n not in group.dropdowns
+                   and n not in spawning]
+        if not pending:
+            return
+        if os.getloadavg()[0] > self.idle_load:
+            self.qtile.call_later(self.delay, self._step)
+            return
+        name = pending[0]
+        if not self._fits(name):
+            logger.info("prewarm: %s would exceed the memory budget, stopping", name)
+            return
+        # ScratchPad._spawn starts it the way a toggle would, _to_hide makes
+        # it hide the window as soon as it is captured
+        group._spawn(group._dropdownconfig[name])
+        group._to_hide.append(name)
+        self.started.append(name)
+        logger.info("prewarm: started %s", name)
+        # give it time to map and settle before the next one
+        self.qtile.call_later(self.delay, self._step)
+
+    def toggle(self, qtile, name):
+        self.qtile = self.qtile or qtile
+        group = self._group()
+        dropdown = group.dropdowns.get(name)
+        dropdown_toggle = command(group, "dropdown_toggle")
+        if dropdown is not None and dropdown.visible:
+            dropdown_toggle(name)
+            return
+        mode = "cold" if dropdown is None else "warm"
+        if dropdown is None and name in group._to_hide:
+            # prewarm still starting up, show it when it arrives
+            group._to_hide.remove(name)
+        start = time.perf_counter()
+        dropdown_toggle(name)
+        self._wait_visible(name, mode, start)
+
+    def _wait_visible(self, name, mode, start):
+        dropdown = self._group().dropdowns.get(name)
+        elapsed = time.perf_counter() - start
+        if dropdown is not None and dropdown.visible:
+            self.latencies.setdefault(name, []).append((mode, elapsed))
+            logger.info("prewarm: %s visible after %.0f ms (%s)", name, elapsed * 1000, mode)
+        elif elapsed < GIVE_UP:
+            self.qtile.call_later(POLL, self._wait_visible, name, mode, start)
+
+    def report(self):
+        lines = []
+        for name, samples in self.latencies.items():
+            for mode in ("cold", "warm"):
+                times = sorted(t for m, t in samples if m == mode)
+                if times:
+                    lines.append(f"{name} {mode}: {len(times)} toggles, "
+                                 f"median {times[len(times) // 2] * 1000:.0f} ms")
+        if self.started:
+            lines.append(f"prewarmed: {', '.join(self.started)} using {self.used_mb():.0f} MB")
+        return "\n".join(lines)
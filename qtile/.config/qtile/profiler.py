@@ -0,0 +1,132 @@
+# Opt-in startup profiler.
+#
+# Start qtile with QTILE_PROFILE set to get wall-clock and CPU time for each
+# config phase (imports, palette, widget list) and for every widget's
+# _configure and first draw:
+#
+#   QTILE_PROFILE=1 qtile start                       # ~/.cache/qtile/startup-trace.json
+#   QTILE_PROFILE=/tmp/trace.json qtile start
+#
+# The trace is Chrome trace JSON (open it in chrome://tracing or Perfetto); a
+# short summary table goes to the qtile log and next to the trace as .txt.
+# When QTILE_PROFILE is unset every helper here is a no-op.
+#
+# This module only uses the standard library so config.py can import it
+# before anything heavy.
+
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger("libqtile")
+
+_setting = os.environ.get("QTILE_PROFILE", "")
+enabled = bool(_setting)
+trace_path = (
+    _setting
+    if _setting not in ("", "1")
+    else os.path.expanduser("~/.cache/qtile/startup-trace.json")
+)
+
+_origin = time.perf_counter()
+_events = []
+_pending_draws = set()
+_written = False
+
+
+def _now_us():
+    return (time.perf_counter() - _origin) * 1e6
+
+
+def record(name, cat, start_us, dur_us, cpu_ms):
+    _events.append({
+        "name": name,
+        "cat": cat,
+        "ph": "X",
+        "ts": round(start_us, 1),
+        "dur": round(dur_us, 1),
+        "pid": os.getpid(),
+        "tid": threading.get_ident(),
+        "args": {"cpu_ms": round(cpu_ms, 3)},
+    })
+
+
+@contextlib.contextmanager
+def _span(name, cat):
+    start, cpu = _now_us(), time.process_time()
+    try:
+        yield
+    finally:
+        record(name, cat, start, _now_us() - start, (time.process_time() - cpu) * 1000)
+
+
+def span(name, cat="phase"):
+    """Context manager timing one config phase."""
+    if not enabled:
+        return contextlib.nullcontext()
+    return _span(name, cat)
+
+
+def _timed(widget, attr, label, once=False):
+    original = getattr(widget, attr)
+
+    def wrapper(*args, **kwargs):
+        if once:
+            # put the real method back before running it
+            setattr(widget, attr, original)
+        with _span(f"{label}.{attr}", "widget"):
+            result = original(*args, **kwargs)
+        if once:
+            _pending_draws.discard(id(widget))
+            if not _pending_draws:
+                write()
+        return result
+
+    setattr(widget, attr, wrapper)
+
+
+def instrument_widgets(widgets):
+    """Time _configure and the first draw of every widget in the list."""
+    if not enabled:
+        return widgets
+    for index, widget in enumerate(widgets):
+        label = f"{index:02d}:{type(widget).__name__}"
+        _timed(widget, "_configure", label)
+        _timed(widget, "draw", label, once=True)
+        _pending_draws.add(id(widget))
+    return widgets
+
+
+def summary():
+    totals = {}
+    for event in _events:
+        entry = totals.setdefault(event["name"], [0.0, 0.0])
+        entry[0] += event["dur"] / 1000
+        entry[1] += event["args"]["cpu_ms"]
+    rows = sorted(totals.items(), key=lambda kv: -kv[1][0])
+    width = max((len(name) for name, _ in rows), default=10)
+    lines = [f"{'phase':<{width}}  {'wall ms':>9}  {'cpu ms':>9}"]
+    lines += [f"{name:<{width}}  {wall:9.2f}  {cpu:9.2f}" for name, (wall, cpu) in rows]
+    return "\n".join(lines)
+
+
+def write():
+    """Dump the trace and summary. Runs once, after the last first draw."""
+    global _written
+    if not enabled or _written:
+        return
+    _written = True
+    try:
+        os.makedirs(os.path.dirname(trace_path) or ".", exist_ok=True)
+        with open(trace_path, "w") as f:
+            json.dump({"traceEvents": _events, "displayTimeUnit": "ms"}, f)
+        table = summary()
+        with open(os.path.splitext(trace_path)[0] + ".txt", "w") as f:
+            f.write(table + "\n")
+    except OSError:
+        logger.exception("profiler: unable to write %s", trace_path)
+        return
+    logger.info("startup profile written to %s\n%s", trace_path, table)
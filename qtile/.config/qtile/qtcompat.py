@@ -0,0 +1,17 @@
+# qtile command names across versions.
+#
+# This config targets qtile 0.22, where commands are methods called
+# cmd_<name> (qtile.cmd_spawn, window.cmd_togroup, group.cmd_setlayout);
+# 0.23 dropped the prefix. command() returns whichever the running qtile
+# has, so the modules here work on both:
+#
+#   command(qtile, "spawn")("alacritty")
+#   command(window, "togroup")("3")
+
+
+def command(obj, name):
+    """obj.<name>, or obj.cmd_<name> on qtile versions that still prefix it."""
+    fn = getattr(obj, name, None)
+    if fn is None:
+        fn = getattr(obj, "cmd_" + name)
+    return fn
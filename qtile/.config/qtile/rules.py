@@ -0,0 +1,244 @@
+# Indexed window rules.
+#
+# Floating.match tries every float rule on every new window, one Match at a
+# time. RuleSet compiles the rules once: a rule with an exact wm_class,
+# role or wm_type goes into a dict under that value, everything else (title
+# rules, regexes, func= predicates) into a short fallback list. A window
+# then costs a few dict lookups plus the fallback list, however many rules
+# there are (rules on a window id, Match(wid=...), go to the fallback list
+# too). Candidates are still checked against all their criteria, so a rule
+# matches exactly when the equivalent Match would.
+#
+# A RuleSet is a drop-in float rule (it has compare()), and rules can carry
+# actions besides floating:
+#
+#   rules = RuleSet([
+#       *layout.Floating.default_float_rules,   # plain Matches float
+#       Rule(wm_class="Gimp", group="5", floating=False),
+#       Rule(wm_class="mpv", layout="max", group="4"),
+#   ])
+#   floating_layout = layout.Floating(float_rules=[rules])
+#   rules.install()          # apply group/layout actions to new windows
+#
+# The group is applied on client_new, the layout once the window has been
+# added to its group (client_managed). Until then the decision is kept per
+# window id, decision() hands it to other client_new hooks (placement.py).
+#
+#   python rules.py          # indexed vs one-by-one on synthetic windows
+
+import re
+
+from qtcompat import command
+
+INDEXED = ("wm_class", "role", "wm_type")
+
+
+def _facts(window):
+    """The window properties rules look at, read once per window."""
+    # not every backend has roles and types
+    role = getattr(window, "get_wm_role", None)
+    wm_type = getattr(window, "get_wm_type", None)
+    return {
+        "wm_class": window.get_wm_class() or [],
+        "role": role() if role else None,
+        "wm_type": wm_type() if wm_type else None,
+        "title": window.name,
+    }
+
+
+def _check(key, value, facts, window):
+    if key == "func":
+        return bool(value(window))
+    if key == "wm_instance_class":
+        actual = facts["wm_class"][:1]
+    elif key == "net_wm_pid":
+        return window.get_pid() == value
+    elif key == "wid":
+        return window.wid == value
+    else:
+        actual = facts.get(key)
+    if key in ("wm_class", "wm_instance_class"):
+        if isinstance(value, re.Pattern):
+            return any(value.match(c) for c in actual)
+        return value in actual
+    if actual is None:
+        return False
+    if isinstance(value, re.Pattern):
+        return bool(value.match(actual))
+    return actual == value
+
+
+class Rule:
+    """Criteria (as for Match) plus what to do with matching windows."""
+
+    def __init__(self, match=None, floating=None, group=None, layout=None, **criteria):
+        # a qtile Match keeps its criteria in _rules
+        self.criteria = dict(match._rules) if match is not None else criteria
+        self.floating = floating
+        self.group = group
+        self.layout = layout
+        self.order = 0
+
+    def index_key(self):
+        if "wid" in self.criteria:
+            # one window, never worth a dict entry
+            return None
+        for key in INDEXED:
+            if isinstance(self.criteria.get(key), str):
+                return key, self.criteria[key]
+        return None
+
+    def matches(self, facts, window):
+        return all(_check(k, v, facts, window) for k, v in self.criteria.items())
+
+    def __repr__(self):
+        actions = {k: v for k, v in (("floating", self.floating), ("group", self.group),
+                                     ("layout", self.layout)) if v is not None}
+        return f"Rule({self.criteria!r}, {actions!r})"
+
+
+class RuleSet:
+    def __init__(self, rules=()):
+        self.rules = []
+        self.index = {key: {} for key in INDEXED}
+        self.fallback = []
+        # wid -> decide() of windows between client_new and client_managed
+        self.decisions = {}
+        for rule in rules:
+            self.add(rule)
+
+    def add(self, rule):
+        if not isinstance(rule, Rule):
+            # a plain Match in a float rule list means "float it"
+            rule = Rule(rule, floating=True)
+        rule.order = len(self.rules)
+        self.rules.append(rule)
+        key = rule.index_key()
+        if key is None:
+            self.fallback.append(rule)
+        else:
+            self.index[key[0]].setdefault(key[1], []).append(rule)
+
+    def lookup(self, window):
+        """Rules matching `window`, in the order they were given."""
+        facts = _facts(window)
+        candidates = set()
+        for value in facts["wm_class"]:
+            candidates.update(self.index["wm_class"].get(value, ()))
+        for key in ("role", "wm_type"):
+            if facts[key] is not None:
+                candidates.update(self.index[key].get(facts[key], ()))
+        candidates.update(self.fallback)
+        found = [rule for rule in candidates if rule.matches(facts, window)]
+        found.sort(key=lambda rule: rule.order)
+        return found
+
+    def decide(self, window):
+        """(floating, group, layout) for `window`, first rule setting each wins."""
+        floating = group = layout = None
+        for rule in self.lookup(window):
+            if floating is None:
+                floating = rule.floating
+            if group is None:
+                group = rule.group
+            if layout is None:
+                layout = rule.layout
+        return floating, group, layout
+
+    def decision(self, window):
+        """decide(), taken from the client_new hook when install() ran it."""
+        decided = self.decisions.get(window.wid)
+        return decided if decided is not None else self.decide(window)
+
+    def compare(self, window):
+        # Floating.match calls this as if we were a single Match
+        return bool(self.decide(window)[0])
+
+    def install(self):
+        from libqtile import hook, qtile
+
+        @hook.subscribe.client_new
+        def apply_rules(window):
+            _, group, _ = self.decisions[window.wid] = self.decide(window)
+            if group is not None and group in qtile.groups_map:
+                command(window, "togroup")(group)
+
+        @hook.subscribe.client_managed
+        def apply_layout(window):
+            _, _, layout = self.decisions.pop(window.wid, (None, None, None))
+            if layout is not None and window.group is not None:
+                command(window.group, "setlayout")(layout)
+
+        @hook.subscribe.client_killed
+        def forget(window):
+            self.decisions.pop(window.wid, None)
+
+
+def _bench(windows=5000, extra_rules=200):
+    import random
+    import time
+
+    class Window:
+        def __init__(self, wm_class, role, wm_type, name):
+            self._class, self._role, self._type, self.name = wm_class, role, wm_type, name
+
+        def get_wm_class(self):
+            return self._class
+
+        def get_wm_role(self):
+            return self._role
+
+        def get_wm_type(self):
+            return self._type
+
+        def has_fixed_size(self):
+            return False
+
+    # what config.py floats (qtile's defaults + our own), plus a big rule
+    # list to show how it scales
+    base = [
+        Rule(wm_type=t, floating=True)
+        for t in ("utility", "notification", "toolbar", "splash", "dialog")
+    ] + [
+        Rule(wm_class=c, floating=True)
+        for c in ("file_progress", "confirm", "dialog", "download", "error", "notification",
+                  "splash", "toolbar", "confirmreset", "makebranch", "maketag", "ssh-askpass")
+    ] + [
+        Rule(title="branchdialog", floating=True),
+        Rule(title="pinentry", floating=True),
+        Rule(func=lambda w: w.has_fixed_size(), floating=True),
+        Rule(title=re.compile(r"^Picture.in.[Pp]icture$"), floating=True),
+    ]
+    more = [Rule(wm_class=f"app{i}", group=str(i % 8 + 1)) for i in range(extra_rules)]
+
+    rng = random.Random(1)
+    classes = [f"app{i}" for i in range(extra_rules * 2)] + ["Alacritty", "firefox", "dialog"]
+    sample = [
+        Window([c.lower(), c], rng.choice([None, "browser", "pop-up"]),
+               rng.choice(["normal"] * 8 + ["dialog", "utility"]), f"window {n}")
+        for n in range(windows)
+        for c in [rng.choice(classes)]
+    ]
+
+    for label, rules in (("config rules", base), (f"+{extra_rules} app rules", base + more)):
+        ruleset = RuleSet(rules)
+
+        def linear(window):
+            facts = _facts(window)
+            return [r for r in rules if r.matches(facts, window)]
+
+        start = time.perf_counter()
+        expected = [linear(w) for w in sample]
+        one_by_one = time.perf_counter() - start
+        start = time.perf_counter()
+        got = [ruleset.lookup(w) for w in sample]
+        indexed = time.perf_counter() - start
+        assert got == expected
+        print(f"{label}: {len(rules)} rules ({len(ruleset.fallback)} in the fallback list), "
+              f"{windows} windows")
+        print(f"  one by one: {one_by_one / windows * 1e6:7.2f} us/window")
+        print(f"  indexed:    {indexed / windows * 1e6:7.2f} us/window")
+
+
+if __name__ == "__main__":
+    _bench()
@@ -0,0 +1,256 @@
+# One timer for all the system widgets.
+#
+# widget.CPU, widget.Memory, widget.Net and the two battery widgets each ran
+# their own timer and re-read /proc or /sys on their own schedule, so the bar
+# was redrawn up to five times per interval. The Sampler below reads
+# everything in one pass per tick, hands the same snapshot to every
+# subscriber and then draws each affected bar once.
+#
+# Probes are read on every tick. Sources (cpustats.CpuSource,
+# power.BatterySource) decide for themselves when to read and push their
+# section into the snapshot; a push goes out with the next tick, so the bar
+# is still drawn once per tick whatever changed. A source that reads faster
+# than `interval` (CpuSource during a burst) shortens the tick while it does.
+#
+# Every file is read relative to `root`, so the whole thing can be pointed at
+# a fake /proc + /sys tree:
+#
+#   Sampler(root="/tmp/fakeroot").sample()
+
+import asyncio
+import os
+
+from libqtile.log_utils import logger
+from libqtile.widget import base
+
+from assets import atlas_for
+
+
+def default_probes(root="/", net_prefix="k"):
+    from memstats import MemoryProbe
+    from netstats import NetProbe
+
+    return {
+        "mem": MemoryProbe(root),
+        "net": NetProbe(root, net_prefix),
+    }
+
+
+def default_sources(root="/"):
+    from cpustats import CpuSource
+    from power import BatterySource
+
+    return {"cpu": CpuSource(root), "battery": BatterySource(root)}
+
+
+class Sampler:
+    """Reads every probe once per tick and publishes a single snapshot."""
+
+    def __init__(self, interval=5, root="/", probes=None, sources=None, call_later=None):
+        self.interval = interval
+        self.root = root
+        self.probes = probes if probes is not None else default_probes(root)
+        self.sources = sources if sources is not None else default_sources(root)
+        # defaults to the running event loop's, benchmarks pass a virtual clock
+        self.call_later = call_later
+        self.snapshot = {}
+        self._subscribers = []
+        self._handle = None
+
+    def subscribe(self, callback):
+        """callback(snapshot) is called each tick. It returns the bar to redraw
+        if its widget changed, None otherwise."""
+        self._subscribers.append(callback)
+        if self._handle is None:
+            self._handle = self.schedule(0, self.tick)
+            for source in self.sources.values():
+                source.start(self)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+        if not self._subscribers and self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+            for source in self.sources.values():
+                source.stop()
+
+    def sample(self):
+        # pushed sections carry over until their source pushes again
+        snapshot = dict(self.snapshot)
+        for name, probe in self.probes.items():
+            try:
+                snapshot[name] = probe.read()
+            except Exception:
+                logger.exception("Sampler: probe %s failed", name)
+                snapshot[name] = self.snapshot.get(name, {})
+        self.snapshot = snapshot
+        return snapshot
+
+    def publish(self, snapshot):
+        bars = []
+        for callback in list(self._subscribers):
+            dirty = callback(snapshot)
+            if dirty is not None and dirty not in bars:
+                bars.append(dirty)
+        for bar in bars:
+            bar.draw()
+
+    def push(self, section, data):
+        """Called by sources with a new reading for their section, published
+        with the next tick."""
+        self.snapshot = dict(self.snapshot, **{section: data})
+
+    def next_interval(self):
+        wanted = [getattr(source, "current_interval", self.interval)
+                  for source in self.sources.values()]
+        return min([self.interval, *wanted])
+
+    def tick(self):
+        self.publish(self.sample())
+        self._handle = self.schedule(self.next_interval(), self.tick)
+
+    def schedule(self, delay, fn):
+        call_later = self.call_later or asyncio.get_event_loop().call_later
+        return call_later(delay, fn)
+
+
+# the instance shared by every widget in the bar
+sampler = Sampler()
+
+
+class SampledText(base._TextBox):
+    """Text widget fed from one section of the shared Sampler snapshot."""
+
+    defaults = [
+        ("section", "cpu", "Snapshot section: cpu, mem, net or battery"),
+        ("format", "{load_percent}%", "Format string applied to the section"),
+        ("sampler", None, "Sampler to subscribe to, defaults to the shared one"),
+        ("alert", None, "(key, threshold): use alert_foreground while section[key] >= threshold"),
+        ("alert_foreground", "ff5555", "Text colour while the alert threshold is reached"),
+    ]
+
+    def __init__(self, **config):
+        base._TextBox.__init__(self, "", **config)
+        self.add_defaults(SampledText.defaults)
+        self.alerting = False
+
+    def _configure(self, qtile, bar):
+        base._TextBox._configure(self, qtile, bar)
+        self.normal_foreground = self.foreground
+        self.sampler = self.sampler or sampler
+        self.sampler.subscribe(self.on_snapshot)
+
+    def _alert(self, section):
+        if self.alert is None:
+            return False
+        key, threshold = self.alert
+        return section.get(key, 0) >= threshold
+
+    def on_snapshot(self, snapshot):
+        section = snapshot.get(self.section, {})
+        try:
+            text = self.format.format(**section)
+        except (KeyError, ValueError):
+            text = ""
+        alerting = self._alert(section)
+        if text == self.text and alerting == self.alerting:
+            return None
+        if alerting != self.alerting:
+            self.alerting = alerting
+            self.foreground = self.alert_foreground if alerting else self.normal_foreground
+            self.layout.colour = self.foreground
+        self.text = text
+        return self.bar
+
+    def palette_changed(self):
+        # themeswitch has set the new foreground and alert_foreground
+        self.normal_foreground = self.foreground
+        if self.alerting:
+            self.foreground = self.alert_foreground
+        self.layout.colour = self.foreground
+
+    def finalize(self):
+        self.sampler.unsubscribe(self.on_snapshot)
+        base._TextBox.finalize(self)
+
+
+class SampledBatteryIcon(base._Widget):
+    """Battery icon that takes its state from the shared Sampler.
+
+    Drop-in for widget.BatteryIcon (same theme_path and scale), but the icons
+    come from the shared atlas instead of being decoded per widget.
+    """
+
+    ICONS = (
+        "battery-missing",
+        "battery-caution", "battery-low", "battery-good", "battery-full",
+        "battery-caution-charging", "battery-low-charging", "battery-good-charging",
+        "battery-full-charging", "battery-full-charged",
+    )
+
+    defaults = [
+        ("theme_path", "~/.config/qtile/Assets/Battery/", "Directory of battery-*.png"),
+        ("scale", 1, "Icon height relative to the bar"),
+        ("padding", 0, "Padding left and right of the icon"),
+        ("sampler", None, "Sampler to subscribe to, defaults to the shared one"),
+    ]
+
+    def __init__(self, **config):
+        base._Widget.__init__(self, 0, **config)
+        self.add_defaults(SampledBatteryIcon.defaults)
+        self.current_icon = "battery-missing"
+
+    def _configure(self, qtile, bar):
+        base._Widget._configure(self, qtile, bar)
+        self.atlas = atlas_for(max(int((self.bar.height - 2) * self.scale), 1))
+        self.icons = {}
+        for name in self.ICONS:
+            path = os.path.join(os.path.expanduser(self.theme_path), f"{name}.png")
+            try:
+                self.icons[name] = self.atlas.add(path)
+            except Exception:
+                logger.exception("SampledBatteryIcon: can't load %s", path)
+        # fixed width, so a state change never relayouts the bar
+        widest = max((self.atlas.size(p)[0] for p in self.icons.values()), default=0)
+        self.length = widest + 2 * self.padding
+        self.sampler = self.sampler or sampler
+        self.sampler.subscribe(self.on_snapshot)
+
+    @staticmethod
+    def icon_key(battery):
+        if not battery.get("present"):
+            return "battery-missing"
+        percent = battery["percent"]
+        if percent < 0.2:
+            key = "battery-caution"
+        elif percent < 0.4:
+            key = "battery-low"
+        elif percent < 0.8:
+            key = "battery-good"
+        else:
+            key = "battery-full"
+        if battery["status"] == "Full":
+            key = "battery-full-charged"
+        elif battery["status"] == "Charging":
+            key += "-charging"
+        return key
+
+    def on_snapshot(self, snapshot):
+        key = self.icon_key(snapshot.get("battery", {}))
+        if key == self.current_icon:
+            return None
+        self.current_icon = key
+        return self.bar
+
+    def draw(self):
+        self.drawer.clear(self.background or self.bar.background)
+        icon = self.icons.get(self.current_icon)
+        if icon is not None:
+            y = (self.bar.height - self.atlas.height) // 2
+            self.atlas.blit(self.drawer.ctx, icon, self.padding, y)
+        self.drawer.draw(offsetx=self.offsetx, offsety=self.offsety, width=self.width)
+
+    def finalize(self):
+        self.sampler.unsubscribe(self.on_snapshot)
+        base._Widget.finalize(self)
@@ -0,0 +1,199 @@
+# Screens from autorandr profiles.
+#
+# config.py had a single Screen while autorandr knows about a docked
+# HDMI-1 + eDP-1 layout (bkp/config-new.py tried to cope with a hard-coded
+# `del secondary_widgets_list[16:17]`). This module reads the profile
+# configs under ~/.config/autorandr, orders the enabled outputs by position
+# and builds one Screen per output: the primary output gets the full bar,
+# the others a lighter one without the segments marked "primary_only" in the
+# bar spec (Systray can only live once, and the pollers are pointless twice).
+#
+# Parsed profiles are cached by (profile, mtime) outside the reloaded
+# modules (see keep.py). On a dock hot-plug follow_profile() asks autorandr
+# for the profile from a worker thread and, when it changed, builds only the
+# new screens and bars and has qtile reconfigure its screens; widgets, keys
+# and layouts are left as they are.
+
+import asyncio
+import os
+import subprocess
+from collections import namedtuple
+
+from libqtile.log_utils import logger
+
+from keep import kept
+from qtcompat import command
+
+AUTORANDR_DIR = os.path.expanduser("~/.config/autorandr")
+
+Output = namedtuple("Output", "name x y width height primary")
+
+_profiles = kept("screenlayout.profiles")
+# last profile screens were built for, the guess when sysfs is ambiguous
+_state = kept("screenlayout.state")
+# profile the last build_screens() used
+active_profile = None
+# (bar, segments, styles) of every bar it built, for themeswitch
+built = []
+
+
+def parse_config(text):
+    """Enabled outputs of an autorandr `config` file, ordered left to right."""
+    outputs = []
+    current = None
+    for line in text.splitlines():
+        key, _, value = line.strip().partition(" ")
+        if key == "output":
+            current = {"name": value, "off": False, "primary": False}
+            outputs.append(current)
+        elif current is None:
+            continue
+        elif key == "off":
+            current["off"] = True
+        elif key == "primary":
+            current["primary"] = True
+        elif key == "mode":
+            width, _, height = value.partition("x")
+            current["width"], current["height"] = int(width), int(height)
+        elif key == "pos":
+            x, _, y = value.partition("x")
+            current["x"], current["y"] = int(x), int(y)
+    enabled = [
+        Output(o["name"], o.get("x", 0), o.get("y", 0),
+               o.get("width", 0), o.get("height", 0), o["primary"])
+        for o in outputs
+        if not o["off"]
+    ]
+    return sorted(enabled, key=lambda o: (o.x, o.y))
+
+
+def read_profile(name, root=AUTORANDR_DIR):
+    path = os.path.join(root, name, "config")
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return []
+    cached = _profiles.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(path) as f:
+        outputs = parse_config(f.read())
+    _profiles[path] = (mtime, outputs)
+    return outputs
+
+
+def connected_outputs(drm="/sys/class/drm"):
+    count = 0
+    try:
+        entries = os.listdir(drm)
+    except OSError:
+        return None
+    for entry in entries:
+        try:
+            with open(os.path.join(drm, entry, "status")) as f:
+                count += f.read().strip() == "connected"
+        except OSError:
+            continue
+    return count
+
+
+def current_profile(root=AUTORANDR_DIR, ask=True):
+    """Name of the autorandr profile matching the connected outputs, if any.
+
+    Profiles are matched on the number of connected outputs first, which is a
+    few sysfs reads; `autorandr --current` (a python program of its own) is
+    only asked when that is ambiguous, and only with `ask` (it blocks, keep
+    it off the event loop). Without it the last profile used is the guess.
+    """
+    connected = connected_outputs()
+    try:
+        names = sorted(os.listdir(root))
+    except OSError:
+        names = []
+    matches = [n for n in names if connected and len(read_profile(n, root)) == connected]
+    if len(matches) == 1:
+        return matches[0]
+    if not ask:
+        return _state.get("profile")
+    try:
+        proc = subprocess.run(
+            ["autorandr", "--current"], capture_output=True, text=True, timeout=2
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    names = proc.stdout.split()
+    return names[0] if names else None
+
+
+def secondary_spec(spec):
+    return [seg for seg in spec if not seg.get("primary_only")]
+
+
+def build_screens(spec, palette, styles=None, profile=None, root=AUTORANDR_DIR, **bar_config):
+    """One Screen per enabled output of `profile` (default: the current one,
+    as far as sysfs tells; follow_profile() corrects it off the loop).
+
+    `bar_config` is passed to every bar.Bar, e.g. size=30, margin=[...].
+    """
+    from libqtile import bar
+    from libqtile.config import Screen
+
+    from barbuilder import build_widgets
+
+    global active_profile, built
+    if profile is None:
+        profile = current_profile(root, ask=False)
+    active_profile = _state["profile"] = profile
+    outputs = list(read_profile(profile, root)) if profile else []
+    if not outputs:
+        outputs = [Output("default", 0, 0, 0, 0, True)]
+    if not any(o.primary for o in outputs):
+        outputs[0] = outputs[0]._replace(primary=True)
+
+    lighter = secondary_spec(spec)
+    screens = []
+    built = []
+    for output in outputs:
+        segments = spec if output.primary else lighter
+        top = bar.Bar(build_widgets(segments, palette, styles), **bar_config)
+        built.append((top, segments, styles))
+        screens.append(Screen(top=top))
+    return screens
+
+
+def retire_bars(qtile, bars):
+    """Finalize `bars` and their widgets and drop the widgets from
+    qtile.widgets_map, before the screens that replace them are configured."""
+    gone = {id(widget) for top in bars for widget in top.widgets}
+    for top in bars:
+        for widget in top.widgets:
+            try:
+                widget.finalize()
+            except Exception:
+                logger.exception("screenlayout: finalizing %s", widget.name)
+        try:
+            top.finalize()
+        except Exception:
+            logger.exception("screenlayout: finalizing a bar")
+    for name, widget in list(qtile.widgets_map.items()):
+        if id(widget) in gone:
+            del qtile.widgets_map[name]
+
+
+async def follow_profile(qtile, spec, palette, styles=None, root=AUTORANDR_DIR, **bar_config):
+    """Rebuild the screens if the autorandr profile is no longer the one they
+    were built for. Only the screens and their bars are replaced."""
+    loop = asyncio.get_running_loop()
+    profile = await loop.run_in_executor(None, current_profile, root)
+    if profile is None or profile == active_profile:
+        return
+    old = [top for top, _, _ in built]
+    logger.info("screenlayout: %s -> %s", active_profile, profile)
+    screens = build_screens(spec, palette, styles, profile, root, **bar_config)
+    # the old widgets have to go before the new ones are configured: Systray
+    # only allows one instance, the new widgets would be registered as
+    # "name_1" next to the stale ones, and the old timers and sampler
+    # subscriptions would keep running
+    retire_bars(qtile, old)
+    qtile.config.screens = screens
+    command(qtile, "reconfigure_screens")()
@@ -0,0 +1,220 @@
+# Launching programs off the WM loop, with a warm terminal.
+#
+# lazy.spawn forks the window manager (a big process, so fork is not free)
+# on the event loop, and every new alacritty starts from scratch: GPU
+# context, fonts, config. Spawner keeps one `alacritty --daemon` running and
+# opens terminals in it with `alacritty msg create-window`, which only has
+# to create a window in an already warm process. Everything else is started
+# by a worker thread, so a slow fork never stalls key handling or drawing.
+# If the daemon can't be used (alacritty < 0.13, no socket) terminals are
+# started the normal way. The worker pool and the daemon's pid and socket
+# are kept across reload_config (see keep.py): a reload builds a new
+# Spawner, but no new threads.
+#
+# Each launch is timed from the key press to the first window of the
+# command showing up (client_new with the expected WM class, or a window of
+# the started pid); commands that never map a window we manage (rofi draws
+# override-redirect windows) are timed to the exec only.
+#
+#   Key([mod], "Return", lazy.function(spawner.terminal))
+#   Key([mod], "d", lazy.function(spawner.launch, "rofi -show drun"))
+
+import glob
+import os
+import shlex
+import signal
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from libqtile import hook
+from libqtile.log_utils import logger
+
+from keep import kept
+
+GIVE_UP = 10
+
+# pool and daemon, shared by the Spawners of successive config loads
+_shared = kept("spawner")
+
+
+def _sockets(pid="*"):
+    runtime = os.environ.get("XDG_RUNTIME_DIR", "/tmp")
+    return (glob.glob(os.path.join(runtime, "alacritty", f"Alacritty-*-{pid}.sock"))
+            + glob.glob(os.path.join(runtime, f"Alacritty-*-{pid}.sock")))
+
+
+def running_daemon():
+    """(pid, socket) of an alacritty --daemon left by a previous config load."""
+    for socket in _sockets():
+        pid = socket.rsplit("-", 1)[1][:-len(".sock")]
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                if b"--daemon" in f.read().split(b"\0"):
+                    return int(pid), socket
+        except (OSError, ValueError):
+            continue
+    return None, None
+
+
+class Spawner:
+    def __init__(self, terminal="alacritty", workers=1):
+        self.terminal_cmd = terminal
+        if "pool" not in _shared:
+            _shared["pool"] = ThreadPoolExecutor(max_workers=workers,
+                                                 thread_name_prefix="spawner")
+        self.pool = _shared["pool"]
+        self.pending = []  # [label, wm_class or None, pid or None, start]
+        self.latencies = {}  # label -> [seconds]
+        self._children = []
+        # config import, so this is subscribed again after every reload
+        hook.subscribe.client_new(self._on_client_new)
+
+    # the daemon outlives config reloads, so does what we know about it
+    @property
+    def daemon(self):
+        return _shared.get("daemon")  # pid
+
+    @daemon.setter
+    def daemon(self, pid):
+        _shared["daemon"] = pid
+
+    @property
+    def socket(self):
+        return _shared.get("socket")
+
+    @socket.setter
+    def socket(self, path):
+        _shared["socket"] = path
+
+    def start(self, qtile):
+        self.qtile = qtile
+        self.pool.submit(self._start_daemon)
+
+    def _start_daemon(self):
+        # one may be left running by the qtile before a restart
+        self.daemon, self.socket = running_daemon()
+        if self.daemon is not None:
+            return
+        try:
+            proc = subprocess.Popen(
+                [self.terminal_cmd, "--daemon"],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+            )
+        except OSError:
+            logger.exception("spawner: can't start %s --daemon", self.terminal_cmd)
+            return
+        self._children.append(proc)
+        for _ in range(50):
+            if proc.poll() is not None:
+                logger.info("spawner: %s has no --daemon, using plain spawns", self.terminal_cmd)
+                return
+            sockets = _sockets(proc.pid)
+            if sockets:
+                self.daemon, self.socket = proc.pid, sockets[0]
+                logger.info("spawner: terminal daemon ready on %s", self.socket)
+                return
+            time.sleep(0.1)
+        logger.warning("spawner: no socket for terminal daemon %s", proc.pid)
+
+    def _daemon_alive(self):
+        if self.daemon is None or self.socket is None:
+            return False
+        try:
+            os.kill(self.daemon, 0)
+        except OSError:
+            self.daemon = self.socket = None
+            return False
+        return True
+
+    def _run(self, argv, entry):
+        self._reap()
+        try:
+            proc = subprocess.Popen(
+                argv, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL, start_new_session=True,
+            )
+        except OSError:
+            logger.exception("spawner: can't run %s", argv)
+            return
+        self._children.append(proc)
+        entry[2] = proc.pid
+        self.qtile.call_soon_threadsafe(
+            self._record, f"{entry[0]} (exec)", time.perf_counter() - entry[3]
+        )
+
+    def _reap(self):
+        self._children = [p for p in self._children if p.poll() is None]
+
+    def _track(self, label, wm_class, start):
+        entry = [label, wm_class, None, start]
+        self.pending.append(entry)
+        self.qtile.call_later(GIVE_UP, self._expire, entry)
+        return entry
+
+    def launch(self, qtile, cmd, wm_class=None):
+        """Run `cmd` (string or argv) from the worker thread."""
+        argv = shlex.split(cmd) if isinstance(cmd, str) else list(cmd)
+        label = " ".join(argv[:2])
+        self.qtile = qtile
+        entry = self._track(label, wm_class, time.perf_counter())
+        self.pool.submit(self._run, argv, entry)
+
+    def terminal(self, qtile, *args):
+        """New terminal window, from the warm daemon when there is one.
+
+        `args` are alacritty options such as "--title", "x", "-e", "neofetch".
+        """
+        self.qtile = qtile
+        if not self._daemon_alive():
+            self.launch(qtile, [self.terminal_cmd, *args], wm_class="Alacritty")
+            return
+        entry = self._track("terminal (daemon)", "Alacritty", time.perf_counter())
+        argv = [self.terminal_cmd, "msg", "--socket", self.socket, "create-window", *args]
+
+        def run():
+            if subprocess.call(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL):
+                # daemon went away: plain terminal, still timed from the key press
+                self.daemon = self.socket = None
+                entry[0] = "terminal"
+                self._run([self.terminal_cmd, *args], entry)
+
+        self.pool.submit(run)
+
+    def _on_client_new(self, window):
+        now = time.perf_counter()
+        try:
+            pid = window.get_pid()
+            wm_class = window.get_wm_class() or []
+        except Exception:
+            return
+        for entry in self.pending:
+            label, expected, entry_pid, start = entry
+            if (entry_pid is not None and entry_pid == pid) or (expected and expected in wm_class):
+                self.pending.remove(entry)
+                self._record(label, now - start)
+                return
+
+    def _expire(self, entry):
+        if entry in self.pending:
+            self.pending.remove(entry)
+            logger.debug("spawner: %s mapped no managed window", entry[0])
+
+    def _record(self, label, seconds):
+        self.latencies.setdefault(label, []).append(seconds)
+        logger.info("spawner: %s after %.0f ms", label, seconds * 1000)
+
+    def report(self):
+        lines = []
+        for label, samples in self.latencies.items():
+            samples = sorted(samples)
+            lines.append(f"{label}: {len(samples)} launches, "
+                         f"median {samples[len(samples) // 2] * 1000:.0f} ms")
+        return "\n".join(lines)
+
+    def stop(self):
+        """On shutdown only: the daemon is meant to outlive config reloads."""
+        if self._daemon_alive():
+            os.kill(self.daemon, signal.SIGTERM)
+        self.pool.shutdown(wait=False)
+        _shared.clear()
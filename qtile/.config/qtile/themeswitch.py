@@ -0,0 +1,204 @@
+# Theme switching without reload_config.
+#
+# Changing `colors = nord` in config.py meant a reload_config, which tears
+# down and rebuilds every widget. switch() instead pushes the new palette
+# into what is already there: it recompiles the bar spec against the palette
+# (barbuilder's cache makes the second switch to a palette free), sets the
+# background/foreground/extra colours and the powerline edge colours on the
+# existing widgets (and in their decorations, which copied them at
+# configure time), updates the layout borders, and then draws each bar once.
+# The chosen name is remembered in STATE so the next start or reload keeps
+# it.
+#
+#   Key([mod, "shift"], "t", lazy.function(themeswitch.cycle))
+#
+#   python themeswitch.py   # headless switch vs bar rebuild timing
+
+import os
+import time
+
+from libqtile.log_utils import logger
+
+import barbuilder
+import screenlayout
+from colors import palettes
+
+STATE = os.path.expanduser("~/.cache/qtile/theme")
+
+# layout option -> palette role
+LAYOUT_COLORS = {"border_focus": "window_border", "border_normal": "window_border"}
+
+# name of the palette on screen, and how long switching to it took (s)
+current = None
+last_switch = None
+
+
+def saved_theme(default):
+    try:
+        with open(STATE) as f:
+            name = f.read().strip()
+    except OSError:
+        return default
+    return name if name in palettes else default
+
+
+def _save(name):
+    try:
+        os.makedirs(os.path.dirname(STATE), exist_ok=True)
+        with open(STATE, "w") as f:
+            f.write(name + "\n")
+    except OSError:
+        logger.exception("themeswitch: can't save %s", STATE)
+
+
+def layout_colors(palette):
+    return {option: palette[role].hex for option, role in LAYOUT_COLORS.items()}
+
+
+def restyle(widgets, segments, palette, styles=None):
+    """Give widgets built from `segments` the colours of `palette`."""
+    compiled = barbuilder.compiled_for(segments, palette, styles)
+    for widget, seg, derived in zip(widgets, segments, compiled):
+        keys = list(seg.get("colors", {}))
+        if "bg" in seg:
+            keys.append("background")
+        if "fg" in seg:
+            keys.append("foreground")
+        for key in keys:
+            setattr(widget, key, derived[key])
+        if "fg" in seg and getattr(widget, "layout", None) is not None:
+            widget.layout.colour = derived["foreground"]
+        if "_powerline" in derived:
+            for decoration in getattr(widget, "decorations", ()):
+                if hasattr(decoration, "override_colour"):
+                    decoration.override_colour = derived["_powerline"]["override_colour"]
+                    decoration.override_next_colour = derived["_powerline"]["override_next_colour"]
+        if hasattr(widget, "palette_changed"):
+            widget.palette_changed()
+    # the edges are coloured from the widget and its right neighbour, so this
+    # waits until all of them have the new palette
+    for widget in widgets:
+        _recolour_edges(widget)
+
+
+def _recolour_edges(widget):
+    """PowerLineDecoration copies its colours in _configure; refresh them."""
+    for decoration in getattr(widget, "decorations", ()):
+        if not hasattr(decoration, "parent_background"):
+            continue
+        decoration.parent_background = (
+            decoration.override_colour or widget.background or widget.bar.background
+        )
+        set_next_colour = getattr(decoration, "set_next_colour", None)
+        if set_next_colour is not None:
+            set_next_colour()
+        elif decoration.override_next_colour is not None:
+            decoration.next_background = decoration.override_next_colour
+
+
+def restyle_layouts(qtile, palette):
+    options = layout_colors(palette)
+    for group in qtile.groups:
+        for layout in group.layouts:
+            for option, value in options.items():
+                if hasattr(layout, option):
+                    setattr(layout, option, value)
+    # window borders are painted when the layout places the windows
+    for screen in qtile.screens:
+        if screen.group is not None:
+            screen.group.layout_all()
+
+
+def switch(qtile, name, bars=None, persist=True):
+    """Apply palette `name` to the running bars and layouts."""
+    import decorations
+
+    global current, last_switch
+    palette = palettes[name]
+    start = time.perf_counter()
+    decorations.invalidate()
+    bars = screenlayout.built if bars is None else bars
+    for bar, segments, styles in bars:
+        restyle(bar.widgets, segments, palette, styles)
+    restyle_layouts(qtile, palette)
+    for bar, _, _ in bars:
+        bar.draw()
+    last_switch = time.perf_counter() - start
+    current = name
+    if persist:
+        _save(name)
+    logger.info("themeswitch: %s in %.1f ms", name, last_switch * 1000)
+
+
+def cycle(qtile):
+    names = list(palettes)
+    index = names.index(current) if current in names else -1
+    switch(qtile, names[(index + 1) % len(names)])
+
+
+def _bench(rounds=20):
+    import statistics
+    import tempfile
+
+    import benchbar
+    from barbuilder import build_widgets
+    from barspec import bar_styles, make_bar_spec
+    from sampler import Sampler
+
+    bar_spec = make_bar_spec()
+    colors = palettes[saved_theme("nord")]
+
+    clock = benchbar.VirtualClock()
+    qtile = benchbar.FakeQtile(clock)
+    for group in qtile.groups:
+        group.layout_all = lambda: None
+    OffscreenBar = benchbar.make_bar_classes(qtile)
+    spec = [s for s in benchbar.localise_paths(bar_spec)
+            if s["widget"] not in benchbar.HEADLESS_SKIP]
+
+    with tempfile.TemporaryDirectory(prefix="themeswitch-") as fake_root:
+        benchbar.FakeSystem(fake_root)
+        sampler = Sampler(root=fake_root, call_later=clock.call_later)
+
+        def build(palette):
+            # what reload_config does for the bar: new widgets, configure, draw
+            bar = OffscreenBar([])
+            segments = []
+            for seg, widget in zip(spec, build_widgets(spec, palette, bar_styles)):
+                if hasattr(widget, "sampler"):
+                    widget.sampler = sampler
+                try:
+                    widget._configure(qtile, bar)
+                except Exception:
+                    continue
+                bar.widgets.append(widget)
+                segments.append(seg)
+            bar.draw()
+            return bar, segments
+
+        other = [p for p in palettes.values() if p is not colors][0]
+        rebuild = []
+        for i in range(rounds):
+            start = time.perf_counter()
+            bar, segments = build(other if i % 2 else colors)
+            rebuild.append(time.perf_counter() - start)
+            for widget in bar.widgets:
+                try:
+                    widget.finalize()
+                except Exception:
+                    pass
+
+        bar, segments = build(colors)
+        swap = []
+        for i in range(rounds):
+            switch(qtile, (colors if i % 2 else other).name, [(bar, segments, bar_styles)],
+                   persist=False)
+            swap.append(last_switch)
+
+    print(f"{len(bar.widgets)} widgets, {rounds} rounds")
+    print(f"  rebuild bar (reload_config lower bound) {statistics.median(rebuild) * 1000:8.2f} ms")
+    print(f"  themeswitch.switch                      {statistics.median(swap) * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    _bench()
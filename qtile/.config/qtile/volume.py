@@ -0,0 +1,234 @@
+# Volume icon + percentage in one widget, driven by sound server events.
+#
+# The bar had two widget.Volume instances (one for the icon, one for the
+# text, glued with a negative Spacer), each polling the mixer on its own
+# timer. VolumeIcon draws both and does not poll: it follows
+# `pactl subscribe`, which works on PulseAudio and on PipeWire through
+# pipewire-pulse, and only re-reads the default sink when it changed.
+# Icons come from the shared atlas (assets.py), so reload_config does not
+# decode them again. When `pactl subscribe` exits (pipewire-pulse
+# restarted) it is started again with exponential backoff, like the
+# autostart supervisor restarts daemons, and the sink is re-read.
+#
+# FakeSource replaces pactl for testing:
+#
+#   source = FakeSource(40, False)
+#   widget = VolumeIcon(source=source)
+#   source.push(55, False)        # widget redraws with the new value
+
+import asyncio
+import os
+import time
+
+from libqtile.log_utils import logger
+from libqtile.widget import base
+
+from assets import atlas_for
+from qtcompat import command
+
+ICONS = ("audio-volume-muted", "audio-volume-low", "audio-volume-medium", "audio-volume-high")
+
+
+def icon_name(volume, muted):
+    if muted or volume <= 0:
+        return "audio-volume-muted"
+    if volume < 30:
+        return "audio-volume-low"
+    if volume < 70:
+        return "audio-volume-medium"
+    return "audio-volume-high"
+
+
+class PactlSource:
+    """Default sink volume through pactl, changes via `pactl subscribe`."""
+
+    def __init__(self, sink="@DEFAULT_SINK@", backoff=1.0, max_backoff=60.0):
+        self.sink = sink
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._proc = None
+
+    async def _pactl(self, *args):
+        proc = await asyncio.create_subprocess_exec(
+            "pactl", *args,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+        )
+        out, _ = await proc.communicate()
+        return out.decode()
+
+    async def read(self):
+        volume = await self._pactl("get-sink-volume", self.sink)
+        mute = await self._pactl("get-sink-mute", self.sink)
+        # "Volume: front-left: 32768 /  50% / -18.06 dB,   front-right: ..."
+        percents = [
+            int(p.strip().rstrip("%")) for p in volume.split("/") if p.strip().endswith("%")
+        ]
+        level = round(sum(percents) / len(percents)) if percents else 0
+        return level, mute.strip().endswith("yes")
+
+    async def events(self):
+        backoff = self.backoff
+        restarted = False
+        while True:
+            started = time.monotonic()
+            try:
+                self._proc = await asyncio.create_subprocess_exec(
+                    "pactl", "subscribe",
+                    stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+                )
+            except OSError as e:
+                logger.warning("VolumeIcon: can't run pactl subscribe: %s", e)
+            else:
+                if restarted:
+                    # anything may have changed while it was gone
+                    yield
+                while True:
+                    line = await self._proc.stdout.readline()
+                    if not line:
+                        break
+                    # sink volume/mute changes, and default sink switches (server)
+                    if b"on sink #" in line or b"on server" in line:
+                        yield
+                await self._proc.wait()
+            # a subscription that ran for a while resets the backoff
+            if time.monotonic() - started > self.max_backoff:
+                backoff = self.backoff
+            logger.warning("VolumeIcon: pactl subscribe ended, restarting in %.1fs", backoff)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+            restarted = True
+
+    def command(self, *args):
+        return ["pactl", *args]
+
+    def close(self):
+        if self._proc is not None and self._proc.returncode is None:
+            self._proc.terminate()
+
+
+class FakeSource:
+    """In-process stand-in for PactlSource."""
+
+    def __init__(self, volume=50, muted=False):
+        self.state = (volume, muted)
+        self.reads = 0
+        self._queue = asyncio.Queue()
+
+    def push(self, volume, muted=False):
+        self.state = (volume, muted)
+        self._queue.put_nowait(None)
+
+    async def read(self):
+        self.reads += 1
+        return self.state
+
+    async def events(self):
+        while True:
+            yield await self._queue.get()
+
+    def command(self, *args):
+        return None
+
+    def close(self):
+        pass
+
+
+class VolumeIcon(base._TextBox):
+    """Volume icon and percentage, updated from sound server events."""
+
+    defaults = [
+        ("theme_path", "~/.config/qtile/Assets/Volume/", "Directory of audio-volume-*.png"),
+        ("format", "{volume}%", "Text next to the icon, {volume} available"),
+        ("mute_format", "Mute", "Text while muted"),
+        ("step", 5, "Volume step in percent for the scroll wheel"),
+        ("icon_spacing", 2, "Pixels between icon and text"),
+        ("source", None, "Event source, defaults to PactlSource()"),
+    ]
+
+    def __init__(self, **config):
+        base._TextBox.__init__(self, "", **config)
+        self.add_defaults(VolumeIcon.defaults)
+        self.theme_path = os.path.expanduser(self.theme_path)
+        self.volume = None
+        self.muted = False
+        self.current_icon = None
+        self.redraws = 0
+        self._task = None
+        self.add_callbacks({
+            "Button1": self.toggle_mute,
+            "Button4": lambda: self.change(self.step),
+            "Button5": lambda: self.change(-self.step),
+        })
+
+    def _configure(self, qtile, bar):
+        base._TextBox._configure(self, qtile, bar)
+        if self.source is None:
+            self.source = PactlSource()
+        self.atlas = atlas_for(self.bar.height - 2 * max(self.actual_padding, 1))
+        self.icons = {}
+        for name in ICONS:
+            try:
+                self.icons[name] = self.atlas.add(os.path.join(self.theme_path, f"{name}.png"))
+            except Exception:
+                logger.exception("VolumeIcon: can't load %s from %s", name, self.theme_path)
+
+    async def _config_async(self):
+        self._task = asyncio.create_task(self._follow())
+
+    async def _follow(self):
+        try:
+            self._set(*await self.source.read())
+            async for _ in self.source.events():
+                self._set(*await self.source.read())
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("VolumeIcon: event source failed")
+
+    def _set(self, volume, muted):
+        if (volume, muted) == (self.volume, self.muted):
+            return
+        self.volume, self.muted = volume, muted
+        self.current_icon = icon_name(volume, muted)
+        self.redraws += 1
+        self.update(self.mute_format if muted else self.format.format(volume=volume))
+
+    def _icon(self):
+        return self.icons.get(self.current_icon)
+
+    def calculate_length(self):
+        length = base._TextBox.calculate_length(self)
+        icon = self._icon()
+        if icon is not None:
+            length += self.atlas.size(icon)[0] + self.icon_spacing
+        return length
+
+    def draw(self):
+        if not self.can_draw():
+            return
+        self.drawer.clear(self.background or self.bar.background)
+        x = self.actual_padding
+        icon = self._icon()
+        if icon is not None:
+            y = (self.bar.height - self.atlas.height) // 2
+            x += self.atlas.blit(self.drawer.ctx, icon, x, y) + self.icon_spacing
+        self.layout.draw(x, (self.bar.height - self.layout.height) / 2.0 + 1)
+        self.drawer.draw(offsetx=self.offsetx, offsety=self.offsety, width=self.width)
+
+    def _run(self, *args):
+        cmd = self.source.command(*args)
+        if cmd:
+            command(self.qtile, "spawn")(cmd)
+
+    def toggle_mute(self):
+        self._run("set-sink-mute", "@DEFAULT_SINK@", "toggle")
+
+    def change(self, delta):
+        self._run("set-sink-volume", "@DEFAULT_SINK@", f"{delta:+d}%")
+
+    def finalize(self):
+        if self._task is not None:
+            self._task.cancel()
+        if self.source is not None:
+            self.source.close()
+        base._TextBox.finalize(self)
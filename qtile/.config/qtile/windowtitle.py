@@ -0,0 +1,158 @@
+# Window title widget with coalesced, cached updates.
+#
+# widget.WindowName redraws on every focus and title change. Browsers and
+# terminals that rewrite their title on every keystroke or progress tick
+# flood the bar with redraws. WindowTitle:
+#
+#   - coalesces the title/focus hooks: the first one arms a short timer
+#     (`coalesce`, 50 ms by default) and everything until it fires collapses
+#     into a single refresh;
+#   - fits the title to the space the bar gives it through an LRU cache
+#     keyed by (title, width in chars);
+#   - skips the redraw when the visible, truncated text did not change, e.g.
+#     a progress counter at the end of a title that is cut off anyway.
+#
+#   python windowtitle.py   # synthetic title spam benchmark
+
+import asyncio
+import html
+from functools import lru_cache
+
+from libqtile.pangocffi import markup_escape_text
+from libqtile.widget.windowname import WindowName
+
+ELLIPSIS = "…"
+
+
+@lru_cache(maxsize=512)
+def fit_title(markup, max_chars):
+    """Cut escaped `markup` to `max_chars` visible characters."""
+    if max_chars is None:
+        return markup
+    raw = html.unescape(markup)
+    if len(raw) <= max_chars:
+        return markup
+    return markup_escape_text(raw[: max(max_chars - 1, 0)] + ELLIPSIS)
+
+
+class Coalescer:
+    """Calls `callback` once, `delay` seconds after the first poke."""
+
+    def __init__(self, call_later, delay, callback):
+        self.call_later = call_later
+        self.delay = delay
+        self.callback = callback
+        self.pokes = 0
+        self.flushes = 0
+        self._pending = None
+
+    def poke(self):
+        self.pokes += 1
+        if self._pending is None:
+            self._pending = self.call_later(self.delay, self._fire)
+
+    def _fire(self):
+        self._pending = None
+        self.flushes += 1
+        self.callback()
+
+    def cancel(self):
+        if self._pending is not None:
+            self._pending.cancel()
+            self._pending = None
+
+
+class WindowTitle(WindowName):
+    """WindowName with coalesced hooks and truncation-aware redraw skipping."""
+
+    defaults = [
+        ("coalesce", 0.05, "Seconds over which title/focus changes are merged"),
+    ]
+
+    def __init__(self, **config):
+        WindowName.__init__(self, **config)
+        self.add_defaults(WindowTitle.defaults)
+        self._coalescer = None
+        self._char_width = None
+        self.redraws = 0
+        self.skipped = 0
+
+    def _configure(self, qtile, bar):
+        WindowName._configure(self, qtile, bar)
+        self._coalescer = Coalescer(qtile.call_later, self.coalesce, self._refresh)
+        width, _ = self.drawer.max_layout_size(["x" * 20], self.font, self.fontsize)
+        self._char_width = max(width / 20, 1)
+
+    def hook_response(self, *args):
+        if self._coalescer is None:
+            WindowName.hook_response(self)
+        else:
+            self._coalescer.poke()
+
+    def _refresh(self):
+        WindowName.hook_response(self)
+
+    def _max_chars(self):
+        if not self.length or not self._char_width:
+            return None
+        return int((self.length - 2 * self.actual_padding) // self._char_width)
+
+    def update(self, text):
+        visible = fit_title(text, self._max_chars())
+        if visible == self.text:
+            self.skipped += 1
+            return
+        self.redraws += 1
+        WindowName.update(self, visible)
+
+    def finalize(self):
+        if self._coalescer is not None:
+            self._coalescer.cancel()
+        WindowName.finalize(self)
+
+
+def _bench(seconds=2.0, interval=0.001, width_chars=60):
+    """Spam a title once per `interval` and count what would be redrawn."""
+    import time
+
+    async def run(coalesce, template):
+        loop = asyncio.get_running_loop()
+        drawn = []
+        state = {"title": ""}
+
+        def refresh():
+            visible = fit_title(markup_escape_text(state["title"]), width_chars)
+            if not drawn or drawn[-1] != visible:
+                drawn.append(visible)
+
+        coalescer = Coalescer(loop.call_later, coalesce, refresh)
+        end = time.monotonic() + seconds
+        i = 0
+        while time.monotonic() < end:
+            state["title"] = template.format(i)
+            if coalesce:
+                coalescer.poke()
+            else:
+                refresh()
+            i += 1
+            await asyncio.sleep(interval)
+        await asyncio.sleep(coalesce)
+        return i, len(drawn)
+
+    scenarios = {
+        "short title": "npm install - {}%",
+        "truncated title": "Building project - " * 5 + "{}%",
+    }
+    for label, template in scenarios.items():
+        for coalesce in (0, 0.05):
+            fit_title.cache_clear()
+            changes, redraws = asyncio.run(run(coalesce, template))
+            if not coalesce:
+                print(f"{label}, WindowName: {changes} title changes -> {changes} redraws")
+            print(
+                f"{label}, WindowTitle coalesce={coalesce * 1000:.0f} ms: "
+                f"{changes} changes -> {redraws} redraws ({redraws / seconds:.1f}/s)"
+            )
+
+if __name__ == "__main__":
+    _bench()